@@ -1,8 +1,9 @@
 """Browser Agent - LLM-powered CLI for browser automation."""
 
-from .openrouter import OpenRouterClient, DEFAULT_MODEL
-from .controller import AgentController
-from .cli import run_cli
+from importlib import import_module
+from typing import Any
+
+from .defaults import DEFAULT_MODEL
 
 __version__ = "0.1.0"
 __all__ = [
@@ -12,3 +13,21 @@ __all__ = [
     "DEFAULT_MODEL",
     "__version__",
 ]
+
+# Public names loaded on first access, so importing the entry point does not
+# pull in httpx, rich and prompt_toolkit
+_LAZY_ATTRS = {
+    "run_cli": ".cli",
+    "AgentController": ".controller",
+    "OpenRouterClient": ".openrouter",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import a public name from its submodule on first access."""
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -1,12 +1,12 @@
 """Subprocess wrapper for agent-browser CLI."""
 
 import asyncio
-import json
-import re
+import shutil
 from typing import Optional, Dict, Any, List
 
+from . import jsonutil
 from .logger import SessionLogger
-from .tools import truncate_output
+from .tools import TRUNCATE_LIMIT, truncate_output
 
 
 class AgentBrowserError(Exception):
@@ -17,6 +17,10 @@ class AgentBrowserError(Exception):
 class AgentBrowserWrapper:
     """Wrapper for executing agent-browser commands via subprocess."""
     
+    # Seconds a timed-out command gets to exit after SIGTERM, then after SIGKILL
+    TERMINATE_GRACE = 0.1
+    KILL_WAIT = 2.0
+    
     def __init__(
         self,
         logger: Optional[SessionLogger] = None,
@@ -31,6 +35,8 @@ class AgentBrowserWrapper:
         self.logger = logger
         self.timeout = timeout
         self._browser_session = None
+        # Resolve the CLI once instead of searching PATH on every exec
+        self._executable = shutil.which("agent-browser") or "agent-browser"
     
     async def open(self, url: str) -> Dict[str, Any]:
         """Open a URL and get initial snapshot.
@@ -350,13 +356,19 @@ class AgentBrowserWrapper:
             Result dict with ok, output, and optional refs
         """
         if self.logger:
-            self.logger.log_browser_command(" ".join(cmd))
+            self.logger.log_browser_command(cmd)
         
+        process = None
         try:
+            # Our descriptors are non-inheritable (PEP 446), so there is nothing
+            # for close_fds to close; skipping it also lets CPython use
+            # posix_spawn when the executable is an absolute path.
             process = await asyncio.create_subprocess_exec(
-                *cmd,
+                self._executable,
+                *cmd[1:],
                 stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+                stderr=asyncio.subprocess.PIPE,
+                close_fds=False
             )
             
             stdout, stderr = await asyncio.wait_for(
@@ -365,7 +377,8 @@ class AgentBrowserWrapper:
             )
             
             stdout_str = stdout.decode("utf-8", errors="replace")
-            stderr_str = stderr.decode("utf-8", errors="replace")
+            # stderr is empty for almost every successful command
+            stderr_str = stderr.decode("utf-8", errors="replace") if stderr else ""
             
             if self.logger:
                 self.logger.log_browser_output(stdout_str)
@@ -377,30 +390,37 @@ class AgentBrowserWrapper:
                 error_output = stderr_str or stdout_str or f"Command failed with exit code {process.returncode}"
                 return {
                     "ok": False,
-                    "output": truncate_output(error_output)
+                    "output": truncate_output(error_output, keep="both")
                 }
             
-            # Try to parse JSON output
+            # Try to parse JSON output (only commands run with --json emit it)
             output = stdout_str.strip()
-            try:
-                parsed = json.loads(output)
-                # If it's a dict with expected structure, use it
-                if isinstance(parsed, dict):
-                    return {
-                        "ok": True,
-                        "output": truncate_output(parsed.get("output", output)),
-                        **{k: v for k, v in parsed.items() if k != "output"}
-                    }
-            except json.JSONDecodeError:
-                pass
+            if "--json" in cmd:
+                try:
+                    parsed = jsonutil.loads(output)
+                    # If it's a dict with expected structure, use it
+                    if isinstance(parsed, dict):
+                        parsed_output = parsed.get("output", output)
+                        if len(parsed_output) > TRUNCATE_LIMIT:
+                            parsed_output = truncate_output(parsed_output)
+                        return {
+                            "ok": True,
+                            "output": parsed_output,
+                            **{k: v for k, v in parsed.items() if k != "output"}
+                        }
+                except jsonutil.JSONDecodeError:
+                    pass
             
-            # Return raw output if not JSON
+            # Return raw output if not JSON (usually a short status line)
+            if len(output) > TRUNCATE_LIMIT:
+                output = truncate_output(output)
             return {
                 "ok": True,
-                "output": truncate_output(output)
+                "output": output
             }
             
         except asyncio.TimeoutError:
+            await self._terminate_process(process)
             return {
                 "ok": False,
                 "output": f"Command timed out after {self.timeout}s"
@@ -414,4 +434,28 @@ class AgentBrowserWrapper:
             return {
                 "ok": False,
                 "output": f"Command execution failed: {e}"
-            }
\ No newline at end of file
+            }
+    
+    async def _terminate_process(
+        self,
+        process: Optional[asyncio.subprocess.Process]
+    ) -> None:
+        """Stop a hung subprocess, escalating from SIGTERM to SIGKILL.
+        
+        Args:
+            process: Process to stop
+        """
+        if process is None or process.returncode is not None:
+            return
+        try:
+            # Give agent-browser a moment to shut down cleanly
+            process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), timeout=self.TERMINATE_GRACE)
+                return
+            except asyncio.TimeoutError:
+                pass
+            process.kill()
+            await asyncio.wait_for(process.wait(), timeout=self.KILL_WAIT)
+        except (ProcessLookupError, asyncio.TimeoutError):
+            pass
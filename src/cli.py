@@ -2,15 +2,21 @@
 
 import asyncio
 import os
-from typing import Optional
+import re
+import shutil
+import sys
+from contextlib import aclosing
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 from rich.console import Console
 from rich.panel import Panel
+from rich.style import Style
 from rich.text import Text
-from rich.markdown import Markdown
 from prompt_toolkit import PromptSession
-from prompt_toolkit.history import InMemoryHistory
-from prompt_toolkit.completion import WordCompleter, Completer
+from prompt_toolkit.application import get_app
+from prompt_toolkit.history import InMemoryHistory, ThreadedHistory
+from prompt_toolkit.completion import Completer, Completion, ConditionalCompleter
+from prompt_toolkit.filters import Condition
 
 from .openrouter import OpenRouterClient, OpenRouterError, DEFAULT_MODEL
 from .agent_browser import AgentBrowserWrapper
@@ -24,31 +30,91 @@ from .platform_check import (
 )
 
 
-class ConditionalCompleter(Completer):
-    """Completer that only shows completions when input is empty or starts with /."""
-    
-    def __init__(self, completer: Completer):
-        """Initialize wrapper completer.
-        
+# Characters that can change how a response renders as Markdown
+_MARKDOWN_CHARS = frozenset("*_`#[]>|-+=~<&\\")
+
+# Layout that Markdown changes without any marker character: ordered list
+# items, indented lines, single newlines (joined into one paragraph), runs of
+# blank lines and surrounding whitespace (both collapsed)
+_MARKDOWN_LAYOUT = re.compile(
+    r"^\d+[.)][ \t]|^[ \t]|[^\n]\n(?=[^\n])|\n\n\n|\A\s|\s\Z",
+    re.MULTILINE
+)
+
+_FINAL_TITLE = Text("Final Answer", style="bold")
+
+# Pre-resolved styles for messages that embed dynamic text; printing them as
+# Text skips Rich's markup parser (and stops "[...]" in the text being
+# read as markup)
+_ERROR_STYLE = Style(color="red")
+_SUCCESS_STYLE = Style(color="green")
+_INFO_STYLE = Style(color="blue")
+_WARNING_STYLE = Style(color="yellow")
+_DIM_STYLE = Style(dim=True)
+
+
+def _is_plain_text(text: str) -> bool:
+    """Check whether text renders the same as Markdown and as plain text.
+
+    Args:
+        text: Response text
+
+    Returns:
+        True if the Markdown parser can be skipped
+    """
+    return _MARKDOWN_CHARS.isdisjoint(text) and _MARKDOWN_LAYOUT.search(text) is None
+
+
+class CommandCompleter(Completer):
+    """Completer for slash commands and their sub-commands.
+
+    Commands are stored as a word-level trie of nested dicts, e.g.
+    ``{"/debug": {"on": {}, "off": {}}}``, so completing a word is one dict
+    walk over the words already typed plus a prefix scan of the children.
+    """
+
+    def __init__(self, tree: Dict[str, Dict[str, Any]]):
+        """Initialize completer.
+
         Args:
-            completer: The underlying completer to wrap
+            tree: Nested dict of command words
         """
-        self.completer = completer
-    
+        self.tree = tree
+
     def get_completions(self, document, complete_event):
-        """Get completions only when input is empty or starts with /.
-        
+        """Get completions for the word before the cursor.
+
         Args:
             document: The document to complete
             complete_event: The complete event
-            
+
         Yields:
-            Completions from the wrapped completer
+            Completions for the current word
         """
-        text = document.text_before_cursor.strip()
-        # Only show completions when input is empty or starts with /
-        if not text or text.startswith("/"):
-            yield from self.completer.get_completions(document, complete_event)
+        text = document.text_before_cursor.lstrip()
+        words = text.split()
+        # A trailing space means the last word is complete
+        if not text or text[-1].isspace():
+            words.append("")
+
+        node = self.tree
+        for word in words[:-1]:
+            node = node.get(word.lower())
+            if node is None:
+                return
+
+        prefix = words[-1]
+        lowered = prefix.lower()
+        for option in node:
+            if option.startswith(lowered):
+                yield Completion(option, start_position=-len(prefix))
+
+
+@Condition
+def _at_command_start() -> bool:
+    """Only offer completions when input is empty or starts with /."""
+    text = get_app().current_buffer.document.text_before_cursor
+    return text.lstrip()[:1] in ("", "/")
 
 
 class CLI:
@@ -68,16 +134,30 @@ class CLI:
             debug: Enable debug mode
         """
         self.console = Console()
+        self._refresh_console_size()
         self.debug = debug
         self._should_exit = False
         self._reset_requested = False
         
-        # Setup prompt session with history
-        self.prompt_session = PromptSession(history=InMemoryHistory())
+        # Setup prompt session with history (loaded off the event loop, so a
+        # persistent history backend would not delay the first prompt)
+        self.prompt_session = PromptSession(history=ThreadedHistory(InMemoryHistory()))
+        
+        # Slash-command dispatch table
+        self._command_table: Dict[str, Callable[[str], Awaitable[None]]] = {
+            "/help": self._cmd_help,
+            "/exit": self._cmd_exit,
+            "/reset": self._cmd_reset,
+            "/debug": self._cmd_debug,
+        }
         
         # Command completer
-        commands = ["/help", "/exit", "/reset", "/debug"]
-        self.completer = ConditionalCompleter(WordCompleter(commands))
+        command_tree: Dict[str, Dict[str, Any]] = {name: {} for name in self._command_table}
+        command_tree["/debug"] = {"on": {}, "off": {}}
+        self.completer = ConditionalCompleter(
+            CommandCompleter(command_tree),
+            filter=_at_command_start
+        )
         
         # Initialize components
         self._client: Optional[OpenRouterClient] = None
@@ -88,6 +168,15 @@ class CLI:
         self.api_key = api_key or os.environ.get("OPENROUTER_API_KEY")
         self.model = model or os.environ.get("OPENROUTER_MODEL")
     
+    def _refresh_console_size(self) -> None:
+        """Pin the console size to the current terminal size.
+
+        Rich otherwise queries the terminal size on every print. The size is
+        refreshed once per task, so resizes are picked up between tasks.
+        """
+        if self.console.is_terminal:
+            self.console.size = shutil.get_terminal_size()
+    
     def print_welcome(self) -> None:
         """Print welcome message."""
         self.console.print("\n[bold cyan]Browser Agent CLI[/bold cyan]\n", justify="center")
@@ -125,7 +214,7 @@ class CLI:
         Args:
             message: Error message
         """
-        self.console.print(f"[red]Error: {message}[/red]")
+        self.console.print(Text(f"Error: {message}", style=_ERROR_STYLE))
     
     def print_success(self, message: str) -> None:
         """Print a success message.
@@ -133,7 +222,7 @@ class CLI:
         Args:
             message: Success message
         """
-        self.console.print(f"[green]{message}[/green]")
+        self.console.print(Text(message, style=_SUCCESS_STYLE))
     
     def print_info(self, message: str) -> None:
         """Print an info message.
@@ -141,7 +230,7 @@ class CLI:
         Args:
             message: Info message
         """
-        self.console.print(f"[blue]{message}[/blue]")
+        self.console.print(Text(message, style=_INFO_STYLE))
     
     def check_prerequisites(self) -> bool:
         """Check if all prerequisites are met.
@@ -187,24 +276,15 @@ class CLI:
         # Handle reset request
         if self._reset_requested:
             self._reset_requested = False
-            self._controller.reset()
-
-            # Create new logger and browser wrapper
-            runs_dir = create_runs_directory()
-            self._logger = SessionLogger(runs_dir)
-            self._logger.open_browser_log()
-
-            # Update controller with new browser wrapper
-            from .agent_browser import AgentBrowserWrapper
-            new_browser = AgentBrowserWrapper(logger=self._logger)
-            self._controller.browser = new_browser
-            self._controller.logger = self._logger
-        
-        # Ensure session is initialized
-        if self._logger is None:
-            runs_dir = create_runs_directory()
-            self._logger = SessionLogger(runs_dir)
-            self._logger.open_browser_log()
+            # Nothing to reset before the first task has run
+            if self._controller is not None:
+                self._controller.reset()
+
+                # The previous session log is finished; the next task
+                # starts a new one
+                if self._logger:
+                    self._logger.close()
+                self._logger = None
         
         # Process task
         await self._process_task(user_input)
@@ -215,37 +295,52 @@ class CLI:
         Args:
             command: Command string
         """
-        parts = command.split()
+        # Commands take at most one argument; extra words are ignored
+        parts = command.split(maxsplit=2)
         cmd = parts[0].lower()
-        args = parts[1:] if len(parts) > 1 else []
-        
-        if cmd == "/help":
-            self.print_help()
-        
-        elif cmd == "/exit":
-            self._should_exit = True
+        arg = parts[1].lower() if len(parts) > 1 else ""
         
-        elif cmd == "/reset":
-            self._reset_requested = True
-            self.print_info("Conversation will be reset on next message")
+        handler = self._command_table.get(cmd)
+        if handler is None:
+            # Accept unambiguous prefixes such as /he for /help
+            matches = [name for name in self._command_table if name.startswith(cmd)]
+            if len(matches) == 1:
+                handler = self._command_table[matches[0]]
         
-        elif cmd == "/debug":
-            if args and args[0].lower() in ("on", "true", "1"):
-                self.debug = True
-                if self._controller:
-                    self._controller.debug = True
-                self.print_info("Debug mode enabled")
-            elif args and args[0].lower() in ("off", "false", "0"):
-                self.debug = False
-                if self._controller:
-                    self._controller.debug = False
-                self.print_info("Debug mode disabled")
-            else:
-                status = "on" if self.debug else "off"
-                self.print_info(f"Debug mode is {status}")
+        if handler is None:
+            self.print_error(f"Unknown command: {cmd}")
+            return
         
+        await handler(arg)
+    
+    async def _cmd_help(self, arg: str) -> None:
+        """Handle /help."""
+        self.print_help()
+    
+    async def _cmd_exit(self, arg: str) -> None:
+        """Handle /exit."""
+        self._should_exit = True
+    
+    async def _cmd_reset(self, arg: str) -> None:
+        """Handle /reset."""
+        self._reset_requested = True
+        self.print_info("Conversation will be reset on next message")
+    
+    async def _cmd_debug(self, arg: str) -> None:
+        """Handle /debug [on|off]."""
+        if arg in ("on", "true", "1"):
+            self.debug = True
+            if self._controller:
+                self._controller.debug = True
+            self.print_info("Debug mode enabled")
+        elif arg in ("off", "false", "0"):
+            self.debug = False
+            if self._controller:
+                self._controller.debug = False
+            self.print_info("Debug mode disabled")
         else:
-            self.print_error(f"Unknown command: {cmd}")
+            status = "on" if self.debug else "off"
+            self.print_info(f"Debug mode is {status}")
     
     async def _process_task(self, task: str) -> None:
         """Process a task through the controller.
@@ -253,6 +348,21 @@ class CLI:
         Args:
             task: User's task
         """
+        self._refresh_console_size()
+
+        # Create the session log on the first real task (slash commands never
+        # touch the filesystem)
+        if self._logger is None:
+            runs_dir = create_runs_directory()
+            self._logger = SessionLogger(runs_dir)
+            self._logger.open_browser_log()
+
+            # After /reset, point the existing browser wrapper at the new log
+            # instead of building a new one
+            if self._controller is not None:
+                self._controller.browser.logger = self._logger
+                self._controller.logger = self._logger
+
         # Ensure components are initialized
         if self._client is None:
             self._client = OpenRouterClient(api_key=self.api_key, model=self.model)
@@ -266,98 +376,111 @@ class CLI:
             )
 
         # Variables for handling multiple message panels
-        full_response = ""
-        tool_log = ""
+        response_parts: List[str] = []
+        tool_log_parts: List[str] = []
         is_final = False
 
         try:
-            # Stream response
-            async for chunk in self._controller.process_task(task):
-                chunk_type = chunk.get("type")
-                content = chunk.get("content", "")
-
-                if chunk_type == "message_start":
-                    # Start new message - reset accumulators
-                    full_response = ""
-                    tool_log = ""
-                    is_final = False
-
-                elif chunk_type == "content":
-                    # Streaming text from assistant
-                    full_response += content
-
-                elif chunk_type == "debug" and self.debug:
-                    # Debug info - includes tool calls when debug mode is on
-                    tool_log += f"[DEBUG] {content}\n"
-
-                elif chunk_type == "tool_call":
-                    # Display tool execution progress
-                    tool_name = chunk.get("tool", "unknown")
-                    args = chunk.get("args", {})
-                    self.console.print(f"[dim]→ {tool_name}({args})[/dim]")
-
-                elif chunk_type == "warning":
-                    # Warning
-                    self.console.print(f"\n[yellow]Warning: {content}[/yellow]")
-
-                elif chunk_type == "error":
-                    # Error
-                    self.console.print(f"\n[red]Error: {content}[/red]")
-
-                elif chunk_type == "loop_detected":
-                    # Loop detected - prompt user to continue or stop
-                    action = chunk.get("action")
-                    args = chunk.get("args", {})
-                    self.console.print(f"\n[yellow]Loop detected: {action}({args})[/yellow]")
-                    self.console.print("[yellow]Agent is repeating actions. Press Enter to continue or Ctrl+C to stop.[/yellow]")
-                    try:
-                        await self.prompt_session.prompt_async("")
-                    except KeyboardInterrupt:
-                        self.console.print("\n[yellow]Stopping execution.[/yellow]")
-                        break
-
-                elif chunk_type == "message_end":
-                    # End of current message - display panel
-                    is_final = chunk.get("is_final", False)
-                    if is_final:
-                        # Only show final panel if there's actual content
-                        if full_response:
-                            self.console.print(self._create_final_display(full_response))
-                        else:
-                            # Warn if final message has no content (model didn't respond)
-                            self.console.print("\n[yellow]⚠ Model completed without providing a text response[/yellow]")
-                    elif full_response:
-                        self.console.print(self._create_display(full_response, tool_log))
-                    elif tool_log:
-                        # Only show tool logs if debug mode is on
-                        if self.debug:
-                            self.console.print(self._create_display("", tool_log))
-
-                elif chunk_type == "usage":
-                    # Token usage and cost
-                    prompt = chunk.get("prompt_tokens", 0)
-                    completion = chunk.get("completion_tokens", 0)
-                    total = chunk.get("total_tokens", 0)
-                    cost = chunk.get("cost_usd", 0)
+            # Stream response; aclosing() runs the controller's cleanup as
+            # soon as we stop consuming it (e.g. at the loop prompt): any
+            # open LLM stream is closed and unanswered tool calls are
+            # resolved so the next task starts from valid history
+            async with aclosing(self._controller.process_task(task)) as stream:
+                async for chunk in stream:
+                    # Every controller chunk carries a type; subscript avoids a
+                    # method call per streamed token
+                    chunk_type = chunk["type"]
+                    content = chunk.get("content", "")
+
+                    if chunk_type == "message_start":
+                        # Start new message - reset accumulators
+                        response_parts.clear()
+                        tool_log_parts.clear()
+                        is_final = False
+
+                    elif chunk_type == "content":
+                        # Streaming text from assistant
+                        response_parts.append(content)
+
+                    elif chunk_type == "debug" and self.debug:
+                        # Debug info - includes tool calls when debug mode is on
+                        tool_log_parts.append(f"[DEBUG] {content}\n")
+
+                    elif chunk_type == "tool_call":
+                        # Display tool execution progress
+                        tool_name = chunk.get("tool", "unknown")
+                        args = chunk.get("args", {})
+                        self.console.print(Text(f"→ {tool_name}({args})", style=_DIM_STYLE))
+
+                    elif chunk_type == "warning":
+                        # Warning
+                        self.console.print(Text(f"\nWarning: {content}", style=_WARNING_STYLE))
+
+                    elif chunk_type == "error":
+                        # Error
+                        self.console.print(Text(f"\nError: {content}", style=_ERROR_STYLE))
+
+                    elif chunk_type == "loop_detected":
+                        # Loop detected - prompt user to continue or stop
+                        action = chunk.get("action")
+                        args = chunk.get("args", {})
+                        self.console.print(Text(f"\nLoop detected: {action}({args})", style=_WARNING_STYLE))
+                        self.console.print("[yellow]Agent is repeating actions. Press Enter to continue or Ctrl+C to stop.[/yellow]")
+                        try:
+                            await self.prompt_session.prompt_async("")
+                        except (KeyboardInterrupt, EOFError):
+                            self.console.print("\n[yellow]Stopping execution.[/yellow]")
+                            break
+
+                    elif chunk_type == "message_end":
+                        # End of current message - display panel
+                        full_response = "".join(response_parts)
+                        tool_log = "".join(tool_log_parts)
+                        is_final = chunk.get("is_final", False)
+                        if is_final:
+                            # Only show final panel if there's actual content
+                            if full_response:
+                                self.console.print(self._create_final_display(full_response))
+                            else:
+                                # Warn if final message has no content (model didn't respond)
+                                self.console.print("\n[yellow]⚠ Model completed without providing a text response[/yellow]")
+                        elif full_response:
+                            self.console.print(self._create_display(full_response, tool_log))
+                        elif tool_log:
+                            # Only show tool logs if debug mode is on
+                            if self.debug:
+                                self.console.print(self._create_display("", tool_log))
+
+                    elif chunk_type == "usage":
+                        # Token usage and cost
+                        prompt = chunk.get("prompt_tokens", 0)
+                        completion = chunk.get("completion_tokens", 0)
+                        total = chunk.get("total_tokens", 0)
+                        cost = chunk.get("cost_usd", 0)
                     
-                    # Get per-query breakdown if available
-                    query_prompt = chunk.get("query_prompt_tokens", 0)
-                    query_completion = chunk.get("query_completion_tokens", 0)
-                    query_total = chunk.get("query_total_tokens", 0)
-                    query_cost = chunk.get("query_cost_usd", 0)
+                        # Get per-query breakdown if available
+                        query_prompt = chunk.get("query_prompt_tokens", 0)
+                        query_completion = chunk.get("query_completion_tokens", 0)
+                        query_total = chunk.get("query_total_tokens", 0)
+                        query_cost = chunk.get("query_cost_usd", 0)
                     
-                    if query_total > 0:
-                        self.console.print(
-                            f"[dim]Query: {query_prompt:,} + {query_completion:,} = {query_total:,} | Query Cost: ${query_cost:.4f}[/dim]"
+                        # Both lines go out in a single terminal write
+                        lines = []
+                        if query_total > 0:
+                            lines.append(
+                                f"Query: {query_prompt:,} + {query_completion:,} = {query_total:,} | Query Cost: ${query_cost:.4f}"
+                            )
+                        lines.append(
+                            f"Session: {prompt:,} prompt + {completion:,} completion = {total:,} total | Session Cost: ${cost:.4f}"
                         )
-                    
-                    self.console.print(
-                        f"[dim]Session: {prompt:,} prompt + {completion:,} completion = {total:,} total | Session Cost: ${cost:.4f}[/dim]"
-                    )
+                        self.console.print(Text("\n".join(lines), style=_DIM_STYLE))
 
         except KeyboardInterrupt:
             self.console.print("\n[yellow]Run interrupted by user.[/yellow]")
         finally:
+            # Write out browser log lines still under the flush bound
+            self._logger.flush()
+
             # Show session path
             session_path = self._logger.get_session_path()
             self.console.print(f"\n[dim]Session saved to: {session_path}[/dim]")
@@ -380,8 +503,13 @@ class CLI:
                 Text("--- Tool Logs ---\n", style="dim"),
                 Text(tool_log, style="dim")
             )
+        elif _is_plain_text(response):
+            # Plain prose - skip the Markdown parser
+            content = Text(response)
         else:
-            # Use Markdown for response only
+            # Use Markdown for response only (imported lazily - it is
+            # the heaviest Rich module and plain responses never need it)
+            from rich.markdown import Markdown
             content = Markdown(response)
 
         return Panel(
@@ -400,9 +528,15 @@ class CLI:
         Returns:
             Panel with formatted content
         """
+        if _is_plain_text(response):
+            content = Text(response)
+        else:
+            from rich.markdown import Markdown
+            content = Markdown(response)
+
         return Panel(
-            Markdown(response),
-            title="[bold]Final Answer[/bold]",
+            content,
+            title=_FINAL_TITLE,
             title_align="left",
             border_style="green"
         )
@@ -438,13 +572,31 @@ class CLI:
     async def _cleanup(self) -> None:
         """Cleanup resources."""
         if self._logger:
-            self._logger.close_browser_log()
+            self._logger.close()
         if self._controller:
             await self._controller.cleanup()
         if self._client:
             await self._client.close()
 
 
+def _get_loop_factory() -> Optional[Callable[[], asyncio.AbstractEventLoop]]:
+    """Get uvloop's event loop factory if it is installed.
+
+    Setting BROWSER_AGENT_LOOP=default keeps the stock asyncio loop even when
+    uvloop is available.
+
+    Returns:
+        Loop factory, or None to use the default asyncio loop
+    """
+    if os.environ.get("BROWSER_AGENT_LOOP", "uvloop").lower() == "default":
+        return None
+    try:
+        import uvloop
+    except ImportError:
+        return None
+    return uvloop.new_event_loop
+
+
 def run_cli(
     api_key: Optional[str] = None,
     model: Optional[str] = None,
@@ -458,4 +610,14 @@ def run_cli(
         debug: Enable debug mode
     """
     cli = CLI(api_key=api_key, model=model, debug=debug)
-    asyncio.run(cli.run())
+    loop_factory = _get_loop_factory()
+    if sys.version_info >= (3, 11):
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            runner.run(cli.run())
+    else:
+        # asyncio.run() takes no loop factory before 3.11; uvloop is
+        # selected through its event loop policy instead
+        if loop_factory is not None:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        asyncio.run(cli.run())
@@ -1,12 +1,16 @@
 """Agent controller for LLM orchestration with tool calling."""
 
 import asyncio
-import json
-from typing import Dict, List, Optional, Any, AsyncIterator
+import sys
+from collections import Counter, OrderedDict, deque
+from contextlib import aclosing
+from typing import Deque, Dict, List, Optional, Any, AsyncIterator, Awaitable, Callable, Iterator
 
+from . import jsonutil
 from .openrouter import OpenRouterClient, format_message, format_tool_message
 from .tools import (
     TOOLS,
+    READ_ONLY_TOOLS,
     ToolCall,
     format_tool_result
 )
@@ -14,134 +18,7 @@ from .agent_browser import AgentBrowserWrapper, AgentBrowserError
 from .logger import SessionLogger
 
 
-class AgentController:
-    """Controller for the agent loop with LLM and tool execution."""
-
-    def __init__(
-        self,
-        client: OpenRouterClient,
-        browser: AgentBrowserWrapper,
-        logger: SessionLogger,
-        max_iterations: int = 1000,
-        debug: bool = False
-    ):
-        """Initialize agent controller.
-
-        Args:
-            client: OpenRouter client
-            browser: agent-browser wrapper
-            logger: Session logger
-            max_iterations: Maximum tool iterations per task
-            debug: Enable debug mode
-        """
-        self.client = client
-        self.browser = browser
-        self.logger = logger
-        self.max_iterations = max_iterations
-        self.debug = debug
-
-        # Conversation history
-        self.messages: List[Dict[str, Any]] = []
-        self.system_prompt = self._build_system_prompt()
-
-        # Loop detection: track recent tool call signatures
-        self.recent_actions: List[str] = []
-
-        # Token tracking
-        self.total_prompt_tokens = 0
-        self.total_completion_tokens = 0
-        self.query_prompt_tokens = 0
-        self.query_completion_tokens = 0
-
-        # Cached pricing (will be fetched from API if not in static dict)
-        self._cached_pricing: Optional[Dict[str, float]] = None
-
-        # Sliding window: limit conversation history size
-        self.MAX_HISTORY_MESSAGES = 12  # Reduced from 15
-        self.MAX_SUMMARIZED_HISTORY = 6  # Reduced from 8
-        
-        # Aggressive summarization for large outputs
-        self.SNAPSHOT_RESULT_TOKEN_LIMIT = 1000  # Reduced from 2000
-
-    def _summarize_snapshot_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
-        """Summarize a snapshot result to reduce tokens while preserving key info.
-        
-        Args:
-            result: Result dict from browser_snapshot tool
-            
-        Returns:
-            Minimized result dict
-        """
-        output = result.get("output", "")
-        
-        if not isinstance(output, dict):
-            # Not a dict, return basic summary
-            return {
-                "ok": result.get("ok", False),
-                "output": f"[Snapshot summarized - {len(str(output))} characters]"
-            }
-        
-        refs = output.get("refs", {})
-        snapshot = output.get("snapshot", "")
-        
-        # Simplified approach: just keep summary, not the refs dict
-        # This dramatically reduces token usage
-        minimized = {
-            "ok": result.get("ok", False),
-            "output": f"[Snapshot summarized: {len(refs)} interactive elements, {len(snapshot)} chars of page content]"
-        }
-        
-        return minimized
-
-    def _summarize_tool_result(self, tool_name: str, result: Dict[str, Any]) -> str:
-        """Summarize a tool result for conversation history.
-        
-        Args:
-            tool_name: Name of the tool that was called
-            result: Result dict from tool execution
-            
-        Returns:
-            Brief summary string
-        """
-        if not result.get("ok"):
-            return f"{tool_name} failed"
-        
-        output = result.get("output", "")
-        
-        # For different tool types, create appropriate summaries
-        if tool_name == "browser_open":
-            return f"Opened URL: {output[:100] if output else 'unknown'}"
-        elif tool_name == "browser_snapshot":
-            # Minimal summary - just key metrics
-            if isinstance(output, dict):
-                refs = output.get("refs", {})
-                return f"Snapshot: {len(refs)} interactive elements"
-            return "Snapshot taken"
-        elif tool_name == "browser_screenshot":
-            return "Captured screenshot"
-        elif tool_name == "browser_click":
-            return f"Clicked element"
-        elif tool_name == "browser_fill":
-            return f"Filled input field"
-        elif tool_name == "browser_get_text":
-            return f"Retrieved text: {output[:100]}..."
-        elif tool_name == "browser_scroll":
-            return f"Scrolled page"
-        elif tool_name == "browser_back":
-            return "Navigated back"
-        elif tool_name == "browser_forward":
-            return "Navigated forward"
-        else:
-            # Generic summary for other tools
-            return f"{tool_name} executed"
-
-    def _build_system_prompt(self) -> str:
-        """Build the system prompt for the LLM.
-
-        Returns:
-            System prompt string
-        """
-        return """You are a helpful AI assistant that can browse the web and perform actions.
+SYSTEM_PROMPT = """You are a helpful AI assistant that can browse the web and perform actions.
 
 You have access to browser automation tools through agent-browser. Use these tools to:
 
@@ -260,10 +137,162 @@ EXAMPLE OF CORRECT BEHAVIOR:
 - Then write: I visited NASA website and found that the sky is blue because of Rayleigh scattering. Here is what I discovered...
 """
 
+
+def _summarize_snapshot_output(output: Any) -> str:
+    """Summarize snapshot output with just key metrics."""
+    if isinstance(output, dict):
+        refs = output.get("refs", {})
+        return f"Snapshot: {len(refs)} interactive elements"
+    return "Snapshot taken"
+
+
+# Per-tool summaries of a successful result's output, used when compacting
+# old tool messages in history
+_TOOL_SUMMARIES: Dict[str, Callable[[Any], str]] = {
+    "browser_open": lambda output: f"Opened URL: {output[:100] if output else 'unknown'}",
+    "browser_snapshot": _summarize_snapshot_output,
+    "browser_screenshot": lambda output: "Captured screenshot",
+    "browser_click": lambda output: "Clicked element",
+    "browser_fill": lambda output: "Filled input field",
+    "browser_get_text": lambda output: f"Retrieved text: {output[:100]}...",
+    "browser_scroll": lambda output: "Scrolled page",
+    "browser_back": lambda output: "Navigated back",
+    "browser_forward": lambda output: "Navigated forward",
+}
+
+
+class AgentController:
+    """Controller for the agent loop with LLM and tool execution."""
+
+    def __init__(
+        self,
+        client: OpenRouterClient,
+        browser: AgentBrowserWrapper,
+        logger: SessionLogger,
+        max_iterations: int = 1000,
+        debug: bool = False
+    ):
+        """Initialize agent controller.
+
+        Args:
+            client: OpenRouter client
+            browser: agent-browser wrapper
+            logger: Session logger
+            max_iterations: Maximum tool iterations per task
+            debug: Enable debug mode
+        """
+        self.client = client
+        self.browser = browser
+        self.logger = logger
+        self.max_iterations = max_iterations
+        self.debug = debug
+
+        # Tool name -> bound browser method (e.g. "browser_open" -> browser.open),
+        # built once; the wrapper is kept for the controller's lifetime (/reset
+        # only re-points its logger)
+        self._tool_methods: Dict[str, Callable[..., Awaitable[Dict[str, Any]]]] = {}
+        for tool in TOOLS:
+            tool_name = tool["function"]["name"]
+            method = getattr(browser, tool_name.replace("browser_", "", 1), None)
+            if method is not None:
+                self._tool_methods[tool_name] = method
+
+        # Conversation history, sent to the API as-is. The system message
+        # is always first; the same dict is reused so the prefix is stable.
+        self.system_prompt = SYSTEM_PROMPT
+        self._system_message = format_message("system", self.system_prompt)
+        self.messages: List[Dict[str, Any]] = [self._system_message]
+
+        # Loop detection: track recent tool call signatures
+        self.recent_actions: Deque[str] = deque(maxlen=10)
+        # Occurrences of each signature in recent_actions
+        self._action_counts: "Counter[str]" = Counter()
+
+        # Token tracking
+        self.total_prompt_tokens = 0
+        self.total_completion_tokens = 0
+        self.query_prompt_tokens = 0
+        self.query_completion_tokens = 0
+
+        # Cached pricing (will be fetched from API if not in static dict)
+        self._cached_pricing: Optional[Dict[str, float]] = None
+        # Started on the first task so it overlaps with the agent loop
+        self._pricing_task: Optional["asyncio.Future[Dict[str, float]]"] = None
+
+        # Sliding window: limit conversation history size
+        self.MAX_HISTORY_MESSAGES = 12  # Reduced from 15
+        self.MAX_SUMMARIZED_HISTORY = 6  # Reduced from 8
+        # First history index not yet summarized (0 is the system message)
+        self._summarized_upto = 1
+        
+        # Aggressive summarization for large outputs
+        self.SNAPSHOT_RESULT_TOKEN_LIMIT = 1000  # Reduced from 2000
+
+        # Streamed content is yielded once this many characters are pending
+        # or this many seconds have passed since the last yield
+        self.CONTENT_FLUSH_CHARS = 64
+        self.CONTENT_FLUSH_INTERVAL = 0.01
+
+        # Results of read-only tools, valid until the next action on the page
+        self.TOOL_CACHE_SIZE = 64
+        self._tool_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight_reads: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+
+    def _summarize_snapshot_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Summarize a snapshot result to reduce tokens while preserving key info.
+        
+        Args:
+            result: Result dict from browser_snapshot tool
+            
+        Returns:
+            Minimized result dict
+        """
+        output = result.get("output", "")
+        
+        if not isinstance(output, dict):
+            # Not a dict, return basic summary
+            return {
+                "ok": result.get("ok", False),
+                "output": f"[Snapshot summarized - {len(str(output))} characters]"
+            }
+        
+        refs = output.get("refs", {})
+        snapshot = output.get("snapshot", "")
+        
+        # Simplified approach: just keep summary, not the refs dict
+        # This dramatically reduces token usage
+        minimized = {
+            "ok": result.get("ok", False),
+            "output": f"[Snapshot summarized: {len(refs)} interactive elements, {len(snapshot)} chars of page content]"
+        }
+        
+        return minimized
+
+    def _summarize_tool_result(self, tool_name: str, result: Dict[str, Any]) -> str:
+        """Summarize a tool result for conversation history.
+        
+        Args:
+            tool_name: Name of the tool that was called
+            result: Result dict from tool execution
+            
+        Returns:
+            Brief summary string
+        """
+        if not result.get("ok"):
+            return f"{tool_name} failed"
+        
+        summarize = _TOOL_SUMMARIES.get(tool_name)
+        if summarize is None:
+            # Generic summary for other tools
+            return f"{tool_name} executed"
+        return summarize(result.get("output", ""))
+
     def reset(self) -> None:
         """Reset conversation history and close browser."""
-        self.messages = []
-        self.recent_actions = []
+        self.messages = [self._system_message]
+        self.recent_actions.clear()
+        self._action_counts.clear()
+        self._summarized_upto = 1
         self.total_prompt_tokens = 0
         self.total_completion_tokens = 0
         # Note: We don't close the browser here as it may be reused
@@ -281,6 +310,12 @@ EXAMPLE OF CORRECT BEHAVIOR:
         Yields:
             Streaming response chunks with type and content
         """
+        # Apply the sliding window between tasks, never mid-task
+        self._trim_history()
+        self._start_pricing_fetch()
+        # The page may have changed between tasks
+        self._tool_cache.clear()
+
         # Log and add user message to conversation history
         self.logger.log_message("user", user_task)
         self.messages.append(format_message("user", user_task))
@@ -289,224 +324,393 @@ EXAMPLE OF CORRECT BEHAVIOR:
         self.query_prompt_tokens = 0
         self.query_completion_tokens = 0
 
-        # Build messages for API call
-        api_messages = [
-            format_message("system", self.system_prompt),
-            *self.messages
-        ]
-
-        iteration = 0
-        accumulated_tool_calls: List[ToolCall] = []
-        tool_call_args_buffers: List[str] = []
-        assistant_accumulated_content = ""
-        assistant_tool_calls: List[Dict[str, Any]] = []
-
-        while iteration < self.max_iterations:
-            iteration += 1
-
-            # Signal start of new message
-            yield {"type": "message_start"}
+        try:
+            loop = asyncio.get_running_loop()
+            iteration = 0
+            accumulated_tool_calls: List[ToolCall] = []
+            tool_call_args_buffers: List[List[str]] = []
+            content_parts: List[str] = []
+            assistant_tool_calls: List[Dict[str, Any]] = []
+
+            while iteration < self.max_iterations:
+                iteration += 1
+
+                # Signal start of new message
+                yield {"type": "message_start"}
+
+                # Reset state for new iteration
+                content_parts = []
+                assistant_tool_calls = []
+                accumulated_tool_calls = []
+                tool_call_args_buffers = []
+
+                if self.debug:
+                    yield {
+                        "type": "debug",
+                        "content": f"Iteration {iteration}/{self.max_iterations}"
+                    }
+
+                # Deltas are collected in lists and joined once; growing a str
+                # per delta copies the whole buffer every time
+                flushed_parts = 0
+                pending_chars = 0
+                last_flush = loop.time()
+
+                try:
+                    # Stream response from LLM
+                    async with aclosing(self.client.stream_chat_completion(
+                        messages=self.messages,
+                        tools=TOOLS
+                    )) as stream:
+                        async for chunk in stream:
+                            # Track token usage from chunk
+                            usage = chunk.get("usage")
+                            if usage:
+                                self.total_prompt_tokens += usage.get("prompt_tokens", 0)
+                                self.total_completion_tokens += usage.get("completion_tokens", 0)
+
+                            # The final usage chunk usually carries no choices
+                            choices = chunk.get("choices")
+                            delta = choices[0].get("delta") if choices else None
+                            if not delta:
+                                continue
+
+                            # Handle content - deltas are coalesced so consumers see
+                            # a few larger chunks instead of one per token
+                            content = delta.get("content", "")
+                            if content:
+                                content_parts.append(content)
+                                pending_chars += len(content)
+                                now = loop.time()
+                                if (
+                                    pending_chars >= self.CONTENT_FLUSH_CHARS
+                                    or now - last_flush >= self.CONTENT_FLUSH_INTERVAL
+                                ):
+                                    yield {
+                                        "type": "content",
+                                        "content": "".join(content_parts[flushed_parts:])
+                                    }
+                                    flushed_parts = len(content_parts)
+                                    pending_chars = 0
+                                    last_flush = now
+
+                            # Handle tool calls
+                            tool_calls = delta.get("tool_calls", [])
+                            if tool_calls:
+                                for tool_delta in tool_calls:
+                                    function = tool_delta.get("function", {})
+                                    call_index = tool_delta.get("index", 0)
+
+                                    # New tool call
+                                    if function.get("name"):
+                                        # Note: Multiple tool calls in single response are accumulated
+                                        # and executed after streaming completes to maintain message order
+
+                                        # Reset args buffer for new tool call
+                                        tool_call_args_buffers.append([])
+
+                                        # Names repeat across the whole session and
+                                        # key the dispatch, cache and loop lookups
+                                        tool_name = sys.intern(function["name"])
+                                        current_tool_call = ToolCall(
+                                            name=tool_name,
+                                            args={},
+                                            call_id=tool_delta.get("id")
+                                        )
+                                        accumulated_tool_calls.append(current_tool_call)
+                                        # Track this tool call for assistant message
+                                        assistant_tool_calls.append({
+                                            "id": tool_delta.get("id"),
+                                            "type": "function",
+                                            "function": {
+                                                "name": tool_name,
+                                                "arguments": ""
+                                            }
+                                        })
+
+                                    # Accumulate arguments (may be streamed)
+                                    if function.get("arguments") and len(accumulated_tool_calls) > 0:
+                                        args_str = function["arguments"]
+                                        call_index = tool_delta.get("index", len(accumulated_tool_calls) - 1)
+                                        if call_index < len(tool_call_args_buffers):
+                                            tool_call_args_buffers[call_index].append(args_str)
+
+                except Exception as e:
+                    if flushed_parts < len(content_parts):
+                        yield {
+                            "type": "content",
+                            "content": "".join(content_parts[flushed_parts:])
+                        }
+                    error_msg = f"Error communicating with LLM: {e}"
+                    self.logger.log_error(error_msg)
+                    yield {
+                        "type": "error",
+                        "content": error_msg
+                    }
+                    break
+
+                # Flush content still held back by coalescing
+                if flushed_parts < len(content_parts):
+                    yield {
+                        "type": "content",
+                        "content": "".join(content_parts[flushed_parts:])
+                    }
+                assistant_accumulated_content = "".join(content_parts)
+
+                # Parse arguments once the stream is complete; parsing each delta
+                # would re-read the whole buffer on every chunk
+                malformed_calls: List[ToolCall] = []
+                for tool_call, assistant_call, args_parts in zip(
+                    accumulated_tool_calls, assistant_tool_calls, tool_call_args_buffers
+                ):
+                    args_str = "".join(args_parts)
+                    assistant_call["function"]["arguments"] = args_str
+                    try:
+                        tool_call.args = jsonutil.loads(args_str or "{}")
+                    except jsonutil.JSONDecodeError:
+                        malformed_calls.append(tool_call)
+
+                # Append assistant message to conversation history FIRST
+                # (must come before tool results per OpenAI API format)
+                assistant_message: Dict[str, Any] = {
+                    "role": "assistant",
+                    "content": assistant_accumulated_content
+                }
+                if assistant_tool_calls:
+                    assistant_message["tool_calls"] = assistant_tool_calls
+                self.messages.append(assistant_message)
 
-            # Reset state for new iteration
-            assistant_accumulated_content = ""
-            assistant_tool_calls = []
-            accumulated_tool_calls = []
-            tool_call_args_buffers = []
+                # Log complete assistant message after streaming is done
+                self.logger.log_message("assistant", assistant_accumulated_content)
 
-            if self.debug:
+                # Signal end of current message
                 yield {
-                    "type": "debug",
-                    "content": f"Iteration {iteration}/{self.max_iterations}"
+                    "type": "message_end",
+                    "is_final": not assistant_tool_calls  # Final if no more tool calls
                 }
 
-            try:
-                # Stream response from LLM
-                async for chunk in self.client.stream_chat_completion(
-                    messages=api_messages,
-                    tools=TOOLS
-                ):
-                    delta = chunk.get("choices", [{}])[0].get("delta", {})
-
-                    # Track token usage from chunk
-                    usage = chunk.get("usage")
-                    if usage:
-                        self.total_prompt_tokens += usage.get("prompt_tokens", 0)
-                        self.total_completion_tokens += usage.get("completion_tokens", 0)
-
-                    # Handle content
-                    content = delta.get("content", "")
-                    if content:
-                        assistant_accumulated_content += content
-                        yield {
-                            "type": "content",
-                            "content": content
-                        }
-
-                    # Handle tool calls
-                    tool_calls = delta.get("tool_calls", [])
-                    if tool_calls:
-                        for tool_delta in tool_calls:
-                            function = tool_delta.get("function", {})
-                            call_index = tool_delta.get("index", 0)
-
-                            # New tool call
-                            if function.get("name"):
-                                # Note: Multiple tool calls in single response are accumulated
-                                # and executed after streaming completes to maintain message order
-
-                                # Reset args buffer for new tool call
-                                tool_call_args_buffers.append("")
-
-                                current_tool_call = ToolCall(
-                                    name=function["name"],
-                                    args={},
-                                    call_id=tool_delta.get("id")
-                                )
-                                accumulated_tool_calls.append(current_tool_call)
-                                # Track this tool call for assistant message
-                                assistant_tool_calls.append({
-                                    "id": tool_delta.get("id"),
-                                    "type": "function",
-                                    "function": {
-                                        "name": function["name"],
-                                        "arguments": ""
-                                    }
-                                })
-
-                            # Accumulate arguments (may be streamed)
-                            if function.get("arguments") and len(accumulated_tool_calls) > 0:
-                                args_str = function["arguments"]
-                                call_index = tool_delta.get("index", len(accumulated_tool_calls) - 1)
-                                if call_index < len(tool_call_args_buffers):
-                                    tool_call_args_buffers[call_index] += args_str
-
-                                # Update the corresponding tool call's arguments
-                                if call_index < len(assistant_tool_calls):
-                                    assistant_tool_calls[call_index]["function"]["arguments"] = tool_call_args_buffers[call_index]
-
-                                # Try to parse arguments
-                                try:
-                                    accumulated_tool_calls[call_index].args = json.loads(tool_call_args_buffers[call_index])
-                                except json.JSONDecodeError:
-                                    # Arguments incomplete, wait for more chunks
-                                    pass
-
-            except Exception as e:
-                error_msg = f"Error communicating with LLM: {e}"
-                self.logger.log_error(error_msg)
+                # Execute all accumulated tool calls (AFTER assistant message)
+                if accumulated_tool_calls:
+                    runnable: List[ToolCall] = []
+                    for tool_call in accumulated_tool_calls:
+                        # Validate that tool arguments are complete (valid JSON)
+                        if tool_call in malformed_calls or not isinstance(tool_call.args, dict):
+                            error = f"Tool call '{tool_call.name}' had incomplete or invalid arguments"
+                            # Every tool call id needs a result, or the next
+                            # request is rejected
+                            self.messages.append(format_tool_message(
+                                tool_call.call_id or "unknown",
+                                jsonutil.dumps({"ok": False, "output": error})
+                            ))
+                            yield {
+                                "type": "error",
+                                "content": error
+                            }
+                            continue
+                        runnable.append(tool_call)
+
+                    for batch in self._batch_tool_calls(runnable):
+                        for tool_call in batch:
+                            # Track action for loop detection
+                            # Only track exact signature for repetition detection
+                            action_sig = tool_call.signature
+                            self._record_action(action_sig)
+
+                            # DISABLED: Pattern-based loop detection (too aggressive)
+                            # Normal navigation sequences (snapshot -> click -> snapshot -> click) 
+                            # were being flagged as loops. Only detect exact repetition.
+                            exact_loop = self._action_counts[action_sig] >= 5
+                        
+                            if exact_loop:
+                                yield {
+                                    "type": "loop_detected",
+                                    "action": tool_call.name,
+                                    "args": tool_call.args
+                                }
+
+                            for event in self._start_tool_call(tool_call):
+                                yield event
+
+                        # Read-only batches run concurrently; results are fed back
+                        # in the original order so tool messages match call ids
+                        results = await asyncio.gather(
+                            *(self._run_tool(tool_call) for tool_call in batch)
+                        )
+
+                        for tool_call, result in zip(batch, results):
+                            for event in self._finish_tool_call(tool_call, result):
+                                yield event
+
+                # Check if we should continue (more tool calls expected)
+                if not assistant_tool_calls:
+                    # No tool calls in this iteration, we're done
+                    break
+
+                # Reset for next iteration
+                accumulated_tool_calls = []
+                tool_call_args_buffers = []
+
+            if iteration >= self.max_iterations:
+                warning = f"Reached maximum iterations ({self.max_iterations})"
+                self.logger.log_error(warning)
                 yield {
-                    "type": "error",
-                    "content": error_msg
+                    "type": "warning",
+                    "content": warning
                 }
-                break
 
-            # Append assistant message to conversation history FIRST
-            # (must come before tool results per OpenAI API format)
-            assistant_message: Dict[str, Any] = {
-                "role": "assistant",
-                "content": assistant_accumulated_content
-            }
-            if assistant_tool_calls:
-                assistant_message["tool_calls"] = assistant_tool_calls
-            self.messages.append(assistant_message)
-            api_messages.append(assistant_message)
+            # Yield usage and cost summary
+            total_tokens = self.total_prompt_tokens + self.total_completion_tokens
+            query_tokens = self.query_prompt_tokens + self.query_completion_tokens
 
-            # Log complete assistant message after streaming is done
-            self.logger.log_message("assistant", assistant_accumulated_content)
+            # Get pricing from OpenRouter API
+            if self._cached_pricing is None:
+                self._start_pricing_fetch()
+                self._cached_pricing = await self._pricing_task
+            pricing = self._cached_pricing or {"input": 0, "output": 0}
+
+            cost = (self.total_prompt_tokens * pricing["input"] + self.total_completion_tokens * pricing["output"]) / 1_000_000
+            query_cost = (self.query_prompt_tokens * pricing["input"] + self.query_completion_tokens * pricing["output"]) / 1_000_000
 
-            # Signal end of current message
             yield {
-                "type": "message_end",
-                "is_final": not assistant_tool_calls  # Final if no more tool calls
+                "type": "usage",
+                "prompt_tokens": self.total_prompt_tokens,
+                "completion_tokens": self.total_completion_tokens,
+                "total_tokens": total_tokens,
+                "cost_usd": cost,
+                "query_prompt_tokens": self.query_prompt_tokens,
+                "query_completion_tokens": self.query_completion_tokens,
+                "query_total_tokens": query_tokens,
+                "query_cost_usd": query_cost
             }
+        finally:
+            # A task stopped between an assistant message and its tool
+            # results (e.g. at the loop prompt) must not leave history the
+            # API rejects on the next request
+            self._close_pending_tool_calls("Not executed: the task was stopped")
 
-            # Execute all accumulated tool calls (AFTER assistant message)
-            if accumulated_tool_calls:
-                for tool_call in accumulated_tool_calls:
-                    # Validate that tool arguments are complete (valid JSON)
-                    if not tool_call.args:
-                        yield {
-                            "type": "error",
-                            "content": f"Tool call '{tool_call.name}' had incomplete or invalid arguments"
-                        }
-                        continue
-
-                    # Track action for loop detection
-                    # Only track exact signature for repetition detection
-                    action_sig = f"{tool_call.name}:{json.dumps(tool_call.args, sort_keys=True)}"
-                    self.recent_actions.append(action_sig)
-                    if len(self.recent_actions) > 10:
-                        self.recent_actions.pop(0)
-
-                    # DISABLED: Pattern-based loop detection (too aggressive)
-                    # Normal navigation sequences (snapshot -> click -> snapshot -> click) 
-                    # were being flagged as loops. Only detect exact repetition.
-                    exact_loop = self.recent_actions.count(action_sig) >= 5
-                    
-                    if exact_loop:
-                        yield {
-                            "type": "loop_detected",
-                            "action": tool_call.name,
-                            "args": tool_call.args
-                        }
+    def _record_action(self, action_sig: str) -> None:
+        """Add an action signature to the recent-actions window.
 
-                    async for result in self._execute_tool_call(
-                        tool_call,
-                        api_messages
-                    ):
-                        yield result
+        Args:
+            action_sig: Signature of the tool call (name and sorted args)
+        """
+        if len(self.recent_actions) == self.recent_actions.maxlen:
+            evicted = self.recent_actions[0]
+            self._action_counts[evicted] -= 1
+            if not self._action_counts[evicted]:
+                del self._action_counts[evicted]
+        self.recent_actions.append(action_sig)
+        self._action_counts[action_sig] += 1
 
-            # Check if we should continue (more tool calls expected)
-            if not assistant_tool_calls:
-                # No tool calls in this iteration, we're done
-                break
+    def _close_pending_tool_calls(self, reason: str) -> None:
+        """Add failed results for tool calls that never got one.
 
-            # Reset for next iteration
-            accumulated_tool_calls = []
-            tool_call_args_buffers = []
+        The API requires every tool call in an assistant message to be
+        answered by a tool message. Only the last assistant message can be
+        unanswered, so the scan stops there.
 
-        if iteration >= self.max_iterations:
-            warning = f"Reached maximum iterations ({self.max_iterations})"
-            self.logger.log_error(warning)
-            yield {
-                "type": "warning",
-                "content": warning
-            }
+        Args:
+            reason: Output to report for each unanswered call
+        """
+        answered = set()
+        for msg in reversed(self.messages):
+            role = msg.get("role")
+            if role == "tool":
+                answered.add(msg.get("tool_call_id"))
+                continue
+            if role == "assistant":
+                for tool_call in msg.get("tool_calls") or ():
+                    call_id = tool_call.get("id") or "unknown"
+                    if call_id not in answered:
+                        self.messages.append(format_tool_message(
+                            call_id,
+                            jsonutil.dumps({"ok": False, "output": reason})
+                        ))
+            break
+
+    def _start_pricing_fetch(self) -> None:
+        """Fetch model pricing in the background if not already fetched."""
+        if self._cached_pricing is None and self._pricing_task is None:
+            self._pricing_task = asyncio.ensure_future(
+                self.client.get_model_pricing(self.client.model)
+            )
 
-        # Yield usage and cost summary
-        total_tokens = self.total_prompt_tokens + self.total_completion_tokens
-        query_tokens = self.query_prompt_tokens + self.query_completion_tokens
+    def _trim_history(self) -> None:
+        """Apply the sliding window to the stored conversation.
 
-        # Get pricing from OpenRouter API
-        if self._cached_pricing is None:
-            self._cached_pricing = await self.client.get_model_pricing(self.client.model)
-        pricing = self._cached_pricing or {"input": 0, "output": 0}
+        Old tool results are summarized, then whole turns are dropped from the
+        front. Cuts are only made before a user message, so an assistant
+        message with tool_calls never loses its tool results.
+        """
+        history = self.messages
+        # Index 0 is the system message and is never trimmed
+        if len(history) - 1 <= self.MAX_HISTORY_MESSAGES:
+            return
+
+        # Summarize old tool results to reduce their size. Messages before
+        # _summarized_upto were handled by an earlier pass.
+        messages_to_summarize = len(history) - self.MAX_SUMMARIZED_HISTORY
+        tool_names = {
+            tool_call.get("id"): tool_call.get("function", {}).get("name", "unknown")
+            for msg in history[1:messages_to_summarize]
+            for tool_call in msg.get("tool_calls") or ()
+        }
+        for msg in history[self._summarized_upto:messages_to_summarize]:
+            if msg.get("role") == "tool":
+                tool_name = tool_names.get(msg.get("tool_call_id"), "unknown")
+                try:
+                    tool_content = jsonutil.loads(msg.get("content", "{}"))
+                    summary = self._summarize_tool_result(tool_name, tool_content)
+                    # Replace full tool result with brief summary
+                    msg["content"] = jsonutil.dumps({
+                        "tool": tool_name,
+                        "ok": tool_content.get("ok", True),
+                        "output": summary
+                    })
+                except (jsonutil.JSONDecodeError, KeyError, AttributeError, TypeError):
+                    msg["content"] = "[Previous tool result summarized]"
+        self._summarized_upto = max(self._summarized_upto, messages_to_summarize)
+
+        # If still over limit, remove the oldest turns
+        while len(history) - 1 > self.MAX_SUMMARIZED_HISTORY:
+            next_turn = next(
+                (i for i in range(2, len(history)) if history[i].get("role") == "user"),
+                None
+            )
+            if next_turn is None:
+                break
+            del history[1:next_turn]
+            self._summarized_upto = max(1, self._summarized_upto - (next_turn - 1))
 
-        cost = (self.total_prompt_tokens * pricing["input"] + self.total_completion_tokens * pricing["output"]) / 1_000_000
-        query_cost = (self.query_prompt_tokens * pricing["input"] + self.query_completion_tokens * pricing["output"]) / 1_000_000
+    def _batch_tool_calls(self, tool_calls: List[ToolCall]) -> List[List[ToolCall]]:
+        """Group tool calls into batches that may run concurrently.
 
-        yield {
-            "type": "usage",
-            "prompt_tokens": self.total_prompt_tokens,
-            "completion_tokens": self.total_completion_tokens,
-            "total_tokens": total_tokens,
-            "cost_usd": cost,
-            "query_prompt_tokens": self.query_prompt_tokens,
-            "query_completion_tokens": self.query_completion_tokens,
-            "query_total_tokens": query_tokens,
-            "query_cost_usd": query_cost
-        }
+        Consecutive read-only calls share a batch; any other call acts on the
+        page and gets a batch of its own, so actions keep their order.
 
-    async def _execute_tool_call(
-        self,
-        tool_call: ToolCall,
-        api_messages: List[Dict[str, Any]]
-    ) -> AsyncIterator[Dict[str, Any]]:
-        """Execute a tool call and feed result back.
+        Args:
+            tool_calls: Tool calls in the order the model issued them
+
+        Returns:
+            List of batches in execution order
+        """
+        batches: List[List[ToolCall]] = []
+        for tool_call in tool_calls:
+            if (
+                tool_call.name in READ_ONLY_TOOLS
+                and batches
+                and batches[-1][0].name in READ_ONLY_TOOLS
+            ):
+                batches[-1].append(tool_call)
+            else:
+                batches.append([tool_call])
+        return batches
+
+    def _start_tool_call(self, tool_call: ToolCall) -> Iterator[Dict[str, Any]]:
+        """Log a tool call and announce it before execution.
 
         Args:
-            tool_call: Tool call to execute
-            api_messages: API messages list to update
+            tool_call: Tool call about to run
 
         Yields:
             Streaming chunks about tool execution
@@ -527,9 +731,20 @@ EXAMPLE OF CORRECT BEHAVIOR:
                 "content": f"Tool call: {tool_call}"
             }
 
-        # Execute tool
-        result = await self._run_tool(tool_call)
+    def _finish_tool_call(
+        self,
+        tool_call: ToolCall,
+        result: Dict[str, Any]
+    ) -> Iterator[Dict[str, Any]]:
+        """Log a tool result and feed it back to the conversation.
+
+        Args:
+            tool_call: Tool call that was executed
+            result: Result from _run_tool
 
+        Yields:
+            Streaming chunks about tool execution
+        """
         # Log result
         self.logger.log_tool_result(
             tool_call.name,
@@ -553,7 +768,7 @@ EXAMPLE OF CORRECT BEHAVIOR:
             }
             tool_message = format_tool_message(
                 tool_call.call_id or "unknown",
-                json.dumps(minimized_result)
+                jsonutil.dumps(minimized_result)
             )
         elif tool_call.name == "browser_snapshot" and result.get("ok"):
             # ALWAYS summarize snapshots - send summarized version to API
@@ -561,44 +776,14 @@ EXAMPLE OF CORRECT BEHAVIOR:
             minimized_result = self._summarize_snapshot_result(result)
             tool_message = format_tool_message(
                 tool_call.call_id or "unknown",
-                json.dumps(minimized_result)
+                jsonutil.dumps(minimized_result)
             )
         else:
             tool_message = format_tool_message(
                 tool_call.call_id or "unknown",
-                json.dumps(result)
+                jsonutil.dumps(result)
             )
-        api_messages.append(tool_message)
-        
-        # Implement sliding window: summarize old tool results
-        if len(self.messages) > self.MAX_HISTORY_MESSAGES:
-            # We need to reduce history size. Strategy:
-            # 1. Keep user/assistant messages (they contain important context)
-            # 2. Summarize old tool results to reduce their size
-            # 3. Only remove very old messages if we're still over limit after summarizing
-            
-            messages_to_summarize = len(self.messages) - self.MAX_SUMMARIZED_HISTORY
-            
-            for i in range(messages_to_summarize):
-                msg = self.messages[i]
-                if msg.get("role") == "tool":
-                    try:
-                        tool_content = json.loads(msg.get("content", "{}"))
-                        tool_name = tool_content.get("tool", "unknown")
-                        summary = self._summarize_tool_result(tool_name, tool_content)
-                        # Replace full tool result with brief summary
-                        msg["content"] = json.dumps({
-                            "tool": tool_name,
-                            "ok": tool_content.get("ok", True),
-                            "output": summary
-                        })
-                    except (json.JSONDecodeError, KeyError):
-                        msg["content"] = "[Previous tool result summarized]"
-            
-            # If still over limit after summarizing, remove oldest messages
-            # (but keep at least MAX_SUMMARIZED_HISTORY)
-            while len(self.messages) > self.MAX_SUMMARIZED_HISTORY:
-                self.messages.pop(0)
+        self.messages.append(tool_message)
 
     async def _run_tool(self, tool_call: ToolCall) -> Dict[str, Any]:
         """Run a tool call.
@@ -610,17 +795,35 @@ EXAMPLE OF CORRECT BEHAVIOR:
             Tool result dict
         """
         try:
-            # Extract method name from tool name (e.g., "browser_open" -> "open")
-            method_name = tool_call.name.replace("browser_", "")
-            method = getattr(self.browser, method_name, None)
+            method = self._tool_methods.get(tool_call.name)
             if not method:
                 return {
                     "ok": False,
                     "output": f"Unknown tool: {tool_call.name}"
                 }
 
-            # Execute tool
-            result = await method(**tool_call.args)
+            # Any other tool may change the page, so cached reads go stale
+            if tool_call.name not in READ_ONLY_TOOLS:
+                self._tool_cache.clear()
+                return await method(**tool_call.args)
+
+            key = tool_call.signature
+            cached = self._tool_cache.get(key)
+            if cached is not None:
+                self._tool_cache.move_to_end(key)
+                return cached
+
+            # Identical reads issued in the same batch share one browser call
+            pending = self._inflight_reads.get(key)
+            if pending is None:
+                pending = asyncio.ensure_future(method(**tool_call.args))
+                self._inflight_reads[key] = pending
+                pending.add_done_callback(lambda _: self._inflight_reads.pop(key, None))
+            result = await pending
+            if result.get("ok"):
+                self._tool_cache[key] = result
+                if len(self._tool_cache) > self.TOOL_CACHE_SIZE:
+                    self._tool_cache.popitem(last=False)
             return result
 
         except AgentBrowserError as e:
@@ -636,6 +839,8 @@ EXAMPLE OF CORRECT BEHAVIOR:
 
     async def cleanup(self) -> None:
         """Cleanup resources."""
+        if self._pricing_task is not None and not self._pricing_task.done():
+            self._pricing_task.cancel()
         try:
             await self.browser.cleanup()
         except Exception:
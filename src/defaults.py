@@ -0,0 +1,7 @@
+"""Default settings shared by the CLI entry point and the API client.
+
+Kept free of third-party imports so the entry point can read them before
+deciding whether to load the rest of the package.
+"""
+
+DEFAULT_MODEL = "anthropic/claude-sonnet-4"
@@ -0,0 +1,68 @@
+"""JSON helpers with optional orjson acceleration."""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is absent
+    orjson = None
+
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can keep
+# catching the stdlib exception regardless of backend.
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Decode a JSON document.
+
+    Args:
+        data: JSON text as str or UTF-8 bytes
+
+    Returns:
+        Decoded Python object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> str:
+    """Encode an object as a JSON string.
+
+    Args:
+        obj: Object to encode
+        sort_keys: Whether to sort object keys, for stable signatures
+
+    Returns:
+        JSON text
+    """
+    if orjson is not None:
+        try:
+            option = orjson.OPT_SORT_KEYS if sort_keys else 0
+            return orjson.dumps(obj, option=option).decode()
+        except TypeError:
+            # orjson is stricter than the stdlib (non-str keys, big ints);
+            # fall through so such values still encode
+            pass
+    return json.dumps(obj, sort_keys=sort_keys)
+
+
+def dumps_line(obj: Any) -> bytes:
+    """Encode an object as one newline-terminated line of UTF-8 JSON.
+
+    Non-ASCII text is written as-is rather than escaped.
+
+    Args:
+        obj: Object to encode
+
+    Returns:
+        JSON line as bytes
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
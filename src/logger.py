@@ -1,14 +1,21 @@
 """Session logging for browser-agent."""
 
-import json
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, List, Optional
+
+from . import jsonutil
 
 
 class SessionLogger:
     """Logger for session transcripts and agent-browser output."""
     
+    # The browser log is buffered but written out after this many lines or
+    # seconds, so a hung or killed session keeps nearly all of it
+    BROWSER_LOG_FLUSH_LINES = 50
+    BROWSER_LOG_FLUSH_INTERVAL = 1.0
+    
     def __init__(self, runs_dir: Optional[Path] = None):
         """Initialize session logger.
         
@@ -26,6 +33,10 @@ class SessionLogger:
         
         self._browser_log_handle = None
         self._browser_log_path = None
+        self._browser_log_pending = 0
+        self._browser_log_flushed_at = 0.0
+        # Opened on first message and kept open for the session
+        self._session_handle = None
     
     def log_message(self, role: str, content: str, **kwargs: Any) -> None:
         """Log a message to the session file.
@@ -42,8 +53,12 @@ class SessionLogger:
             **kwargs
         }
         
-        with open(self.session_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(message, ensure_ascii=False) + "\n")
+        if self._session_handle is None or self._session_handle.closed:
+            self._session_handle = open(self.session_file, "ab")
+        # Records arrive a few per turn, so each is written out at once;
+        # a crashed or killed session keeps its full transcript
+        self._session_handle.write(jsonutil.dumps_line(message))
+        self._session_handle.flush()
     
     def log_tool_call(self, tool: str, args: dict) -> None:
         """Log a tool call.
@@ -102,7 +117,12 @@ class SessionLogger:
             Path to browser log file
         """
         self._browser_log_path = self.browser_log_file
-        self._browser_log_handle = open(self.browser_log_file, "a", encoding="utf-8")
+        # Buffered; write_browser_log flushes on a line or time bound
+        self._browser_log_handle = open(
+            self.browser_log_file, "a", encoding="utf-8", buffering=64 * 1024
+        )
+        self._browser_log_pending = 0
+        self._browser_log_flushed_at = time.monotonic()
         return self._browser_log_path
     
     def write_browser_log(self, line: str) -> None:
@@ -111,18 +131,41 @@ class SessionLogger:
         Args:
             line: Line to write
         """
-        if self._browser_log_handle and not self._browser_log_handle.closed:
-            self._browser_log_handle.write(line + "\n")
-            self._browser_log_handle.flush()
+        if not self._browser_log_open():
+            return
+        self._browser_log_handle.write(line + "\n")
+        self._browser_log_pending += 1
+        now = time.monotonic()
+        if (
+            self._browser_log_pending >= self.BROWSER_LOG_FLUSH_LINES
+            or now - self._browser_log_flushed_at >= self.BROWSER_LOG_FLUSH_INTERVAL
+        ):
+            self._flush_browser_log(now)
+    
+    def _flush_browser_log(self, now: float) -> None:
+        """Write buffered browser log lines to disk.
+        
+        Args:
+            now: Current time.monotonic() value
+        """
+        self._browser_log_handle.flush()
+        self._browser_log_pending = 0
+        self._browser_log_flushed_at = now
     
-    def log_browser_command(self, command: str) -> None:
+    def _browser_log_open(self) -> bool:
+        """Check whether the browser log is accepting writes."""
+        return self._browser_log_handle is not None and not self._browser_log_handle.closed
+    
+    def log_browser_command(self, command: List[str]) -> None:
         """Log a browser command to the browser log.
         
         Args:
-            command: Command string being executed
+            command: Command argv being executed
         """
+        if not self._browser_log_open():
+            return
         timestamp = datetime.now().isoformat()
-        self.write_browser_log(f"[{timestamp}] CMD: {command}")
+        self.write_browser_log(f"[{timestamp}] CMD: {' '.join(command)}")
     
     def log_browser_output(self, output: str) -> None:
         """Log browser output to the browser log.
@@ -130,6 +173,8 @@ class SessionLogger:
         Args:
             output: Output from browser command
         """
+        if not self._browser_log_open():
+            return
         timestamp = datetime.now().isoformat()
         # Truncate very long output in log
         if len(output) > 5000:
@@ -142,6 +187,21 @@ class SessionLogger:
             self._browser_log_handle.close()
             self._browser_log_handle = None
     
+    def flush(self) -> None:
+        """Write buffered browser log lines to disk.
+
+        Transcript records are written out as they are logged.
+        """
+        if self._browser_log_open():
+            self._flush_browser_log(time.monotonic())
+    
+    def close(self) -> None:
+        """Close the session transcript and browser log files."""
+        if self._session_handle and not self._session_handle.closed:
+            self._session_handle.close()
+        self._session_handle = None
+        self.close_browser_log()
+    
     def get_session_path(self) -> Path:
         """Get the session directory path.
         
@@ -152,4 +212,4 @@ class SessionLogger:
     
     def __del__(self):
         """Clean up on deletion."""
-        self.close_browser_log()
+        self.close()
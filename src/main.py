@@ -4,10 +4,7 @@ import sys
 import argparse
 import os
 
-from dotenv import load_dotenv
-
-from .cli import run_cli
-from .openrouter import DEFAULT_MODEL
+from .defaults import DEFAULT_MODEL
 
 
 def main() -> int:
@@ -46,6 +43,11 @@ def main() -> int:
     )
     
     args = parser.parse_args()
+
+    # Deferred so --help and --version return without loading the HTTP
+    # client and terminal UI stacks
+    from dotenv import load_dotenv
+    from .cli import run_cli
     
     # Load .env file if present
     load_dotenv()
@@ -1,14 +1,14 @@
 """OpenRouter streaming client for LLM API."""
 
-import json
 import os
-from typing import AsyncGenerator, Dict, List, Optional, Any
-from functools import lru_cache
+from typing import AsyncGenerator, AsyncIterator, Dict, List, Optional, Any, Tuple, Union
 
 import httpx
 
+from . import jsonutil
+from .defaults import DEFAULT_MODEL
+
 
-DEFAULT_MODEL = "anthropic/claude-sonnet-4"
 API_URL = "https://openrouter.ai/api/v1/chat/completions"
 MODELS_URL = "https://openrouter.ai/api/v1/models"
 
@@ -24,6 +24,22 @@ STATIC_PRICING = {
 }
 
 
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _http2_available() -> bool:
+    """Check whether httpx can negotiate HTTP/2 (needs the h2 package).
+
+    Returns:
+        True if h2 is installed
+    """
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
 class OpenRouterError(Exception):
     """Error from OpenRouter API."""
     pass
@@ -54,10 +70,25 @@ class OpenRouterClient:
         
         self.model = model or os.environ.get("OPENROUTER_MODEL", DEFAULT_MODEL)
         self.timeout = timeout
-        self.client = httpx.AsyncClient(timeout=timeout)
+        # One pooled client for completions and the models list; headers that
+        # never change are set here rather than per request
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            http2=_http2_available(),
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "HTTP-Referer": "https://github.com/browser-agent/browser-agent",
+                "X-Title": "Browser Agent CLI",
+            },
+        )
         
-        # Instance-level pricing cache (not per-call)
-        self._cached_pricing: Optional[Dict[str, float]] = None
+        # Instance-level pricing cache, keyed by model id
+        self._pricing_cache: Dict[str, Dict[str, float]] = {}
+        # OpenRouter models list by id, fetched on first pricing lookup
+        self._models_index: Optional[Dict[str, Dict[str, Any]]] = None
+
+        # Tool definitions are the same on every request; keep their encoding
+        self._encoded_tools: Optional[Tuple[List[Dict[str, Any]], str]] = None
 
     async def get_model_pricing(self, model_name: str) -> Dict[str, float]:
         """Get pricing for a specific model from OpenRouter API.
@@ -70,28 +101,30 @@ class OpenRouterClient:
             Falls back to static pricing if API fetch fails
         """
         # Check instance cache first
-        if self._cached_pricing is not None:
-            return self._cached_pricing
+        cached = self._pricing_cache.get(model_name)
+        if cached is not None:
+            return cached
 
         try:
-            # Fetch models list
-            async with self.client.stream("GET", MODELS_URL) as response:
+            if self._models_index is None:
+                # Fetch models list once; it is one JSON document, so no streaming
+                response = await self.client.get(MODELS_URL)
                 if response.status_code == 200:
-                    data = await response.aread()
-                    models_data = json.loads(data.decode())
-
-                    # Find the model in the list
-                    models = models_data.get("data", [])
-                    for model in models:
-                        if model.get("id") == model_name:
-                            pricing = model.get("pricing", {})
-                            result = {
-                                "input": float(pricing.get("prompt", 0)),
-                                "output": float(pricing.get("completion", 0))
-                            }
-                            # Cache the result
-                            self._cached_pricing = result
-                            return result
+                    models_data = jsonutil.loads(response.content)
+                    self._models_index = {
+                        model.get("id"): model for model in models_data.get("data", [])
+                    }
+
+            model = self._models_index.get(model_name) if self._models_index else None
+            if model is not None:
+                pricing = model.get("pricing", {})
+                result = {
+                    "input": float(pricing.get("prompt", 0)),
+                    "output": float(pricing.get("completion", 0))
+                }
+                # Cache the result
+                self._pricing_cache[model_name] = result
+                return result
         except Exception as e:
             # Log warning and use fallback
             if self.api_key:  # Only log if we have an API key
@@ -120,13 +153,10 @@ class OpenRouterClient:
         Yields:
             Chunks containing 'delta' with content or tool_calls
         """
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "HTTP-Referer": "https://github.com/browser-agent/browser-agent",
-            "X-Title": "Browser Agent CLI",
-            "Content-Type": "application/json",
-        }
-        
+        # Cache the static prefix: tool definitions and the system prompt
+        if messages and messages[0].get("role") == "system" and self._uses_cache_control():
+            messages = [_with_cache_breakpoint(messages[0]), *messages[1:]]
+
         payload = {
             "model": self.model,
             "messages": messages,
@@ -134,16 +164,17 @@ class OpenRouterClient:
             "max_tokens": max_tokens,
             "stream": True,
         }
-        
+        body = jsonutil.dumps(payload)
         if tools:
-            payload["tools"] = tools
+            # Splice the cached tools encoding into the closing brace
+            body = f'{body[:-1]},"tools":{self._encode_tools(tools)}}}'
         
         try:
             async with self.client.stream(
                 "POST",
                 API_URL,
-                headers=headers,
-                json=payload
+                headers=_JSON_HEADERS,
+                content=body.encode()
             ) as response:
                 if response.status_code != 200:
                     error_text = await response.aread()
@@ -151,37 +182,59 @@ class OpenRouterClient:
                         f"OpenRouter API error {response.status_code}: {error_text.decode()}"
                     )
                 
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data = line[6:]
-                        if data == "[DONE]":
-                            break
-
-                        try:
-                            chunk = self._parse_sse_chunk(data)
-                            if chunk:
-                                yield chunk
-                        except Exception:
-                            # Silently skip malformed chunks
-                            continue
+                async for data in _iter_sse_data(response):
+                    if data == b"[DONE]":
+                        break
+
+                    try:
+                        chunk = self._parse_sse_chunk(data)
+                    except Exception:
+                        # Silently skip malformed chunks
+                        continue
+                    if chunk:
+                        yield chunk
         except httpx.TimeoutException:
             raise OpenRouterError(f"Request timed out after {self.timeout}s")
         except httpx.HTTPError as e:
             raise OpenRouterError(f"HTTP error: {e}")
     
-    def _parse_sse_chunk(self, data: str) -> Optional[Dict[str, Any]]:
+    def _uses_cache_control(self) -> bool:
+        """Check whether the model needs explicit prompt-cache breakpoints.
+
+        Anthropic models only reuse a cached prefix that is marked with
+        cache_control; OpenAI-style providers cache prefixes automatically.
+
+        Returns:
+            True if breakpoints should be added
+        """
+        return self.model.startswith("anthropic/")
+
+    def _encode_tools(self, tools: List[Dict[str, Any]]) -> str:
+        """Encode tool definitions, reusing the last encoding for the same list.
+
+        Args:
+            tools: Tool definitions
+
+        Returns:
+            JSON text for the tools array
+        """
+        if self._encoded_tools is None or self._encoded_tools[0] is not tools:
+            self._encoded_tools = (tools, jsonutil.dumps(tools))
+        return self._encoded_tools[1]
+
+    def _parse_sse_chunk(self, data: Union[str, bytes]) -> Optional[Dict[str, Any]]:
         """Parse an SSE chunk from OpenRouter.
         
         Args:
-            data: Raw SSE data string
+            data: Raw SSE data payload
             
         Returns:
             Parsed chunk dict or None if not a valid chunk
         """
         try:
-            chunk = json.loads(data)
+            chunk = jsonutil.loads(data)
             return chunk
-        except json.JSONDecodeError:
+        except jsonutil.JSONDecodeError:
             return None
     
     async def close(self) -> None:
@@ -197,6 +250,54 @@ class OpenRouterClient:
         await self.close()
 
 
+async def _iter_sse_data(response: httpx.Response) -> AsyncIterator[bytes]:
+    """Yield the payload of each SSE "data:" line in a streamed response.
+
+    Lines are split from the raw byte stream, so no str is built for
+    keep-alive comments or for the payloads themselves.
+
+    Args:
+        response: Streaming HTTP response
+
+    Yields:
+        Bytes after the "data: " prefix, without the line ending
+    """
+    pending = b""
+    async for block in response.aiter_bytes():
+        lines = (pending + block).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if line.startswith(b"data: "):
+                yield line[6:].rstrip(b"\r")
+    if pending.startswith(b"data: "):
+        yield pending[6:].rstrip(b"\r")
+
+
+def _with_cache_breakpoint(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a message with a cache_control breakpoint on its text.
+
+    The breakpoint caches everything up to and including this message
+    (tool definitions and the system prompt when applied to the first).
+
+    Args:
+        message: Message with string content
+
+    Returns:
+        New message dict with content as a single text part
+    """
+    content = message.get("content")
+    if not isinstance(content, str) or not content:
+        return message
+    return {
+        **message,
+        "content": [{
+            "type": "text",
+            "text": content,
+            "cache_control": {"type": "ephemeral"}
+        }]
+    }
+
+
 def format_message(role: str, content: str) -> Dict[str, str]:
     """Format a message for the API.
     
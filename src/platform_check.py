@@ -3,10 +3,12 @@
 import platform
 import shutil
 import subprocess
+from functools import lru_cache
 from pathlib import Path
 from typing import Tuple, Optional
 
 
+@lru_cache(maxsize=1)
 def get_platform_info() -> Tuple[str, bool]:
     """Get platform name and whether we're in WSL.
 
@@ -26,12 +28,14 @@ def get_platform_info() -> Tuple[str, bool]:
         return "unknown", False
 
 
+@lru_cache(maxsize=1)
 def _is_wsl() -> bool:
     """Check if running under WSL."""
     try:
-        with open("/proc/version", "r") as f:
-            return "microsoft" in f.read().lower()
-    except (FileNotFoundError, IOError):
+        # The kernel release naming WSL comes first in the file
+        with open("/proc/version", "rb") as f:
+            return b"microsoft" in f.read(256).lower()
+    except OSError:
         return False
 
 
@@ -45,7 +49,7 @@ def check_shell_compatibility() -> Optional[str]:
     
     if platform_name == "windows":
         shell = get_current_shell()
-        if shell in ("powershell", "cmd"):
+        if shell == "windows":
             return (
                 "Windows PowerShell/CMD detected. "
                 "Please use WSL or Git Bash for full compatibility.\n\n"
@@ -63,11 +67,13 @@ def check_shell_compatibility() -> Optional[str]:
     return None
 
 
+@lru_cache(maxsize=1)
 def get_current_shell() -> str:
     """Detect current shell.
 
     Returns:
-        Shell name: 'bash', 'zsh', 'fish', 'powershell', 'cmd', or 'unknown'
+        Shell name: 'bash', 'zsh', 'fish', 'windows' (a native PowerShell or
+        CMD shell), or 'unknown'
     """
     import os
 
@@ -95,18 +101,9 @@ def get_current_shell() -> str:
 
     # Windows-specific detection
     if platform.system().lower() == "windows":
-        # Check for PowerShell or CMD
-        try:
-            result = subprocess.run(
-                ["powershell", "-Command", "echo $PSVersionTable.PSVersion"],
-                capture_output=True,
-                timeout=1
-            )
-            if result.returncode == 0:
-                return "powershell"
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            pass
-        return "cmd"
+        # PowerShell and CMD are not told apart: neither is supported, and
+        # no environment variable distinguishes them reliably
+        return "windows"
 
     return "unknown"
 
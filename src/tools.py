@@ -1,8 +1,30 @@
 """Tool definitions and schemas for browser automation."""
 
-import json
+from functools import cached_property
 from typing import Any, Dict, List, Optional
 
+from . import jsonutil
+
+
+# Maximum characters of tool output returned to the LLM
+TRUNCATE_LIMIT = 10000
+
+# Tools that only read page state; consecutive calls to these are safe to
+# run concurrently
+READ_ONLY_TOOLS = frozenset({
+    "browser_snapshot",
+    "browser_get_text",
+    "browser_get_value",
+    "browser_get_url",
+    "browser_get_title",
+})
+
+# Schema for the element reference parameter most tools take; shared
+# rather than repeated in each tool definition
+_REF_PARAM = {
+    "type": "string",
+    "description": "Element reference from the snapshot (e.g., 'e1')"
+}
 
 # Tool definitions for OpenAI-compatible API
 TOOLS = [
@@ -58,10 +80,7 @@ TOOLS = [
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "ref": {
-                        "type": "string",
-                        "description": "Element reference from the snapshot (e.g., 'e1')"
-                    }
+                    "ref": _REF_PARAM
                 },
                 "required": ["ref"]
             }
@@ -75,10 +94,7 @@ TOOLS = [
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "ref": {
-                        "type": "string",
-                        "description": "Element reference from the snapshot (e.g., 'e1')"
-                    },
+                    "ref": _REF_PARAM,
                     "text": {
                         "type": "string",
                         "description": "Text to fill into the input"
@@ -96,10 +112,7 @@ TOOLS = [
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "ref": {
-                        "type": "string",
-                        "description": "Element reference from the snapshot (e.g., 'e1')"
-                    }
+                    "ref": _REF_PARAM
                 },
                 "required": ["ref"]
             }
@@ -113,10 +126,7 @@ TOOLS = [
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "ref": {
-                        "type": "string",
-                        "description": "Element reference from the snapshot (e.g., 'e1')"
-                    }
+                    "ref": _REF_PARAM
                 },
                 "required": ["ref"]
             }
@@ -152,10 +162,7 @@ TOOLS = [
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "ref": {
-                        "type": "string",
-                        "description": "Element reference from the snapshot (e.g., 'e1')"
-                    }
+                    "ref": _REF_PARAM
                 },
                 "required": ["ref"]
             }
@@ -195,10 +202,7 @@ TOOLS = [
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "ref": {
-                        "type": "string",
-                        "description": "Element reference from the snapshot (e.g., 'e1')"
-                    },
+                    "ref": _REF_PARAM,
                     "value": {
                         "type": "string",
                         "description": "Value to select"
@@ -233,10 +237,7 @@ TOOLS = [
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "ref": {
-                        "type": "string",
-                        "description": "Element reference from the snapshot (e.g., 'e1')"
-                    },
+                    "ref": _REF_PARAM,
                     "text": {
                         "type": "string",
                         "description": "Text to type"
@@ -254,10 +255,7 @@ TOOLS = [
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "ref": {
-                        "type": "string",
-                        "description": "Element reference from the snapshot (e.g., 'e1')"
-                    }
+                    "ref": _REF_PARAM
                 },
                 "required": ["ref"]
             }
@@ -271,10 +269,7 @@ TOOLS = [
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "ref": {
-                        "type": "string",
-                        "description": "Element reference from the snapshot (e.g., 'e1')"
-                    }
+                    "ref": _REF_PARAM
                 },
                 "required": ["ref"]
             }
@@ -429,6 +424,17 @@ class ToolCall:
         self.args = args
         self.call_id = call_id
     
+    @cached_property
+    def signature(self) -> str:
+        """Stable identity of the call: name plus sorted-key JSON args.
+
+        Computed on first access, so args must be final by then.
+
+        Returns:
+            Signature string, e.g. 'browser_click:{"ref":"e1"}'
+        """
+        return f"{self.name}:{jsonutil.dumps(self.args, sort_keys=True)}"
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary.
         
@@ -472,9 +478,14 @@ def parse_tool_calls(delta: Dict[str, Any]) -> Optional[ToolCall]:
     if not name:
         return None
     
+    # Arguments are streamed in fragments; a complete object always ends with
+    # "}", so skip the decoder (and its exception) for partial ones
+    if not args_str.rstrip().endswith("}"):
+        return None
+    
     try:
-        args = json.loads(args_str)
-    except json.JSONDecodeError:
+        args = jsonutil.loads(args_str)
+    except jsonutil.JSONDecodeError:
         # Arguments might be streamed in chunks
         return None
     
@@ -498,31 +509,44 @@ def format_tool_result(
     Returns:
         Formatted tool result
     """
-    result = {
+    return {
         "tool_result": {
             "tool": tool,
             "ok": ok,
-            "output": output
+            "output": output,
+            **kwargs
         }
     }
-    if kwargs:
-        result["tool_result"].update(kwargs)
-    return result
 
 
-def truncate_output(output: str, max_size: int = 10000) -> str:
+def truncate_output(
+    output: str,
+    max_size: int = TRUNCATE_LIMIT,
+    keep: str = "head"
+) -> str:
     """Truncate output if too large.
     
     Args:
         output: Output string
         max_size: Maximum size in characters
+        keep: "head" to keep the start, or "both" to keep the start and
+            end (errors usually end with the cause)
         
     Returns:
         Truncated output with indicator if needed
     """
-    if len(output) <= max_size:
+    total = len(output)
+    if total <= max_size:
         return output
     
+    if keep == "both":
+        half = max_size // 2
+        return (
+            output[:half]
+            + f"\n\n[{total - 2 * half} characters omitted]\n\n"
+            + output[total - half:]
+        )
+    
     # Try to truncate at a reasonable boundary (end of line or sentence)
     truncated = output[:max_size]
     
@@ -540,5 +564,5 @@ def truncate_output(output: str, max_size: int = 10000) -> str:
     
     return (
         truncated
-        + f"\n\n[Output truncated: {len(output)} total characters, showing first {len(truncated)}]"
+        + f"\n\n[Output truncated: {total} total characters, showing first {len(truncated)}]"
     )
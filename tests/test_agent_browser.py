@@ -0,0 +1,82 @@
+"""Tests for the agent-browser subprocess wrapper."""
+
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+
+from src.agent_browser import AgentBrowserWrapper
+
+
+class FakeProcess:
+    """Stand-in for asyncio.subprocess.Process."""
+
+    def __init__(self, stdout=b"", stderr=b"", returncode=0, hang=False):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = None if hang else returncode
+        self.hang = hang
+        self.terminate = MagicMock()
+        self.kill = MagicMock()
+
+    async def communicate(self):
+        if self.hang:
+            await asyncio.Event().wait()
+        return self.stdout, self.stderr
+
+    async def wait(self):
+        # A hung process ignores both signals
+        await asyncio.Event().wait()
+
+
+@pytest.fixture
+def fake_exec(monkeypatch):
+    """Fixture that makes create_subprocess_exec return a given process."""
+    def install(process):
+        async def create_subprocess_exec(*args, **kwargs):
+            return process
+        monkeypatch.setattr(asyncio, "create_subprocess_exec", create_subprocess_exec)
+        return process
+    return install
+
+
+class TestRunCommand:
+    """Test command execution and output handling."""
+
+    @pytest.mark.asyncio
+    async def test_output_without_json_flag_stays_raw(self, fake_exec):
+        """Test JSON-looking stdout is not parsed for commands without --json."""
+        fake_exec(FakeProcess(stdout=b'{"output": "inner", "refs": {}}\n'))
+        result = await AgentBrowserWrapper().click("e1")
+        assert result == {"ok": True, "output": '{"output": "inner", "refs": {}}'}
+
+    @pytest.mark.asyncio
+    async def test_json_flag_output_is_parsed(self, fake_exec):
+        """Test --json commands return the parsed output and metadata."""
+        fake_exec(FakeProcess(stdout=b'{"output": "tree", "refs": {"e1": {}}}'))
+        result = await AgentBrowserWrapper().snapshot()
+        assert result == {"ok": True, "output": "tree", "refs": {"e1": {}}}
+
+    @pytest.mark.asyncio
+    async def test_long_error_keeps_head_and_tail(self, fake_exec):
+        """Test oversized error output keeps both its start and its cause."""
+        stderr = ("Error: start\n" + "x" * 30000 + "\nCause: element not found").encode()
+        fake_exec(FakeProcess(stderr=stderr, returncode=1))
+        result = await AgentBrowserWrapper().click("e1")
+        assert not result["ok"]
+        assert result["output"].startswith("Error: start")
+        assert result["output"].endswith("Cause: element not found")
+        assert "characters omitted" in result["output"]
+
+    @pytest.mark.asyncio
+    async def test_timeout_terminates_then_kills(self, fake_exec):
+        """Test a hung command is sent SIGTERM, then SIGKILL, then reported."""
+        process = fake_exec(FakeProcess(hang=True))
+        wrapper = AgentBrowserWrapper(timeout=0.01)
+        wrapper.TERMINATE_GRACE = 0.01
+        wrapper.KILL_WAIT = 0.01
+
+        result = await wrapper.click("e1")
+
+        process.terminate.assert_called_once_with()
+        process.kill.assert_called_once_with()
+        assert result == {"ok": False, "output": "Command timed out after 0.01s"}
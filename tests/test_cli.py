@@ -0,0 +1,78 @@
+"""Tests for the interactive CLI."""
+
+import pytest
+
+from src.cli import CLI, _get_loop_factory, _is_plain_text
+
+
+@pytest.fixture
+def cli():
+    """Fixture for a CLI with a dummy API key."""
+    return CLI(api_key="test-key")
+
+
+class TestHandleCommand:
+    """Test slash-command dispatch."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("command", ["/debug on", "/debug  ON", "/debug on now", "/de on"])
+    async def test_debug_on(self, cli, command):
+        """Test the first argument word is used, whatever follows it."""
+        await cli._handle_command(command)
+        assert cli.debug is True
+
+    @pytest.mark.asyncio
+    async def test_debug_off(self, cli):
+        """Test debug mode can be turned off again."""
+        cli.debug = True
+        await cli._handle_command("/debug off please")
+        assert cli.debug is False
+
+    @pytest.mark.asyncio
+    async def test_debug_without_argument_keeps_mode(self, cli):
+        """Test a bare /debug only reports the mode."""
+        await cli._handle_command("/debug")
+        assert cli.debug is False
+
+
+class TestIsPlainText:
+    """Test detection of responses that can skip the Markdown parser."""
+
+    @pytest.mark.parametrize("text", [
+        "The page title is Example Domain.",
+        "Done.\n\nVersion 2.0 is installed.",
+    ])
+    def test_plain(self, text):
+        """Test prose without Markdown syntax is plain."""
+        assert _is_plain_text(text)
+
+    @pytest.mark.parametrize("text", [
+        "1. Open the page\n2. Click login",
+        "3) Submit",
+        "+ item",
+        "Title\n=====",
+        "~~old~~",
+        "See <https://example.com>",
+        "    indented code",
+        "first line\nsecond line",
+        "a\n\n\nb",
+        "trailing newline\n",
+    ])
+    def test_markdown(self, text):
+        """Test responses whose layout Markdown would change are not plain."""
+        assert not _is_plain_text(text)
+
+
+class TestGetLoopFactory:
+    """Test event loop selection."""
+
+    def test_default_loop_requested(self, monkeypatch):
+        """Test BROWSER_AGENT_LOOP=default keeps the asyncio loop."""
+        monkeypatch.setenv("BROWSER_AGENT_LOOP", "default")
+        assert _get_loop_factory() is None
+
+    def test_uvloop_when_installed(self, monkeypatch):
+        """Test uvloop is chosen when it can be imported."""
+        uvloop = pytest.importorskip("uvloop")
+        monkeypatch.delenv("BROWSER_AGENT_LOOP", raising=False)
+        assert _get_loop_factory() is uvloop.new_event_loop
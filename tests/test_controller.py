@@ -0,0 +1,451 @@
+"""Tests for the agent controller loop with mocked client and browser."""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.controller import AgentController
+from src.logger import SessionLogger
+from src.tools import ToolCall
+
+
+def tool_call_chunk(index, call_id, name, arguments):
+    """Build a streaming chunk carrying one complete tool call."""
+    return {
+        "choices": [{
+            "delta": {
+                "tool_calls": [{
+                    "index": index,
+                    "id": call_id,
+                    "function": {"name": name, "arguments": arguments}
+                }]
+            }
+        }]
+    }
+
+
+def content_chunk(text):
+    """Build a streaming chunk carrying assistant text."""
+    return {"choices": [{"delta": {"content": text}}]}
+
+
+class ScriptedClient:
+    """Fake OpenRouter client that replays one chunk list per LLM call."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.model = "test-model"
+        self.calls = []
+        self.open_streams = 0
+        self.get_model_pricing = AsyncMock(return_value={"input": 0.0, "output": 0.0})
+
+    async def stream_chat_completion(self, messages, tools=None):
+        self.calls.append(list(messages))
+        self.open_streams += 1
+        try:
+            for chunk in self.responses.pop(0):
+                yield chunk
+        finally:
+            self.open_streams -= 1
+
+
+@pytest.fixture
+def logger(tmp_path):
+    """Fixture for a session logger writing to a temp dir."""
+    return SessionLogger(tmp_path)
+
+
+@pytest.fixture
+def browser():
+    """Fixture for a mocked browser wrapper."""
+    mock = MagicMock()
+    mock.get_text = AsyncMock(return_value={"ok": True, "output": "text"})
+    mock.click = AsyncMock(return_value={"ok": True, "output": "clicked"})
+    return mock
+
+
+async def collect(controller, task):
+    """Run a task and return all yielded chunks."""
+    return [chunk async for chunk in controller.process_task(task)]
+
+
+def unanswered_tool_calls(messages):
+    """Return ids of assistant tool calls with no matching tool message."""
+    answered = {m.get("tool_call_id") for m in messages if m.get("role") == "tool"}
+    return [
+        tool_call["id"]
+        for m in messages
+        for tool_call in m.get("tool_calls") or ()
+        if tool_call["id"] not in answered
+    ]
+
+
+class TestBatchToolCalls:
+    """Test grouping of tool calls for concurrent execution."""
+
+    def test_read_only_calls_share_batch(self, logger, browser):
+        """Test consecutive read-only calls are batched together."""
+        controller = AgentController(ScriptedClient([]), browser, logger)
+        calls = [
+            ToolCall("browser_get_text", {"ref": "e1"}),
+            ToolCall("browser_get_url", {}),
+            ToolCall("browser_click", {"ref": "e2"}),
+            ToolCall("browser_get_text", {"ref": "e3"}),
+        ]
+        batches = controller._batch_tool_calls(calls)
+        assert [[c.name for c in b] for b in batches] == [
+            ["browser_get_text", "browser_get_url"],
+            ["browser_click"],
+            ["browser_get_text"],
+        ]
+
+    def test_mutating_calls_stay_sequential(self, logger, browser):
+        """Test each mutating call gets its own batch."""
+        controller = AgentController(ScriptedClient([]), browser, logger)
+        calls = [
+            ToolCall("browser_fill", {"ref": "e1", "text": "a"}),
+            ToolCall("browser_click", {"ref": "e2"}),
+        ]
+        assert len(controller._batch_tool_calls(calls)) == 2
+
+
+class TestProcessTask:
+    """Test the agent loop."""
+
+    @pytest.mark.asyncio
+    async def test_final_answer_without_tools(self, logger, browser):
+        """Test a plain text response ends the loop."""
+        client = ScriptedClient([[content_chunk("Hello")]])
+        controller = AgentController(client, browser, logger)
+        chunks = await collect(controller, "hi")
+        types = [c["type"] for c in chunks]
+        assert "content" in types
+        assert chunks[-1]["type"] == "usage"
+        assert {"type": "message_end", "is_final": True} in chunks
+
+    @pytest.mark.asyncio
+    async def test_usage_chunk_without_choices(self, logger, browser):
+        """Test a trailing usage-only chunk is counted and otherwise skipped."""
+        client = ScriptedClient([[
+            content_chunk("Hello"),
+            {"choices": [], "usage": {"prompt_tokens": 7, "completion_tokens": 3}},
+        ]])
+        controller = AgentController(client, browser, logger)
+        chunks = await collect(controller, "hi")
+        assert chunks[-1]["prompt_tokens"] == 7
+        assert chunks[-1]["completion_tokens"] == 3
+
+    @pytest.mark.asyncio
+    async def test_pricing_fetched_once_up_front(self, logger, browser):
+        """Test pricing is requested before the first LLM call and reused."""
+        client = ScriptedClient([[content_chunk("One")], [content_chunk("Two")]])
+        controller = AgentController(client, browser, logger)
+        stream = controller.process_task("first")
+        await stream.__anext__()
+        await asyncio.sleep(0)
+        assert client.get_model_pricing.await_count == 1
+        [chunk async for chunk in stream]
+        await collect(controller, "second")
+        assert client.get_model_pricing.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_content_deltas_coalesced(self, logger, browser):
+        """Test token deltas are yielded in fewer chunks without losing text."""
+        tokens = [f"tok{i} " for i in range(100)]
+        client = ScriptedClient([[content_chunk(t) for t in tokens]])
+        controller = AgentController(client, browser, logger)
+        controller.CONTENT_FLUSH_INTERVAL = 60
+        chunks = await collect(controller, "hi")
+        content = [c["content"] for c in chunks if c["type"] == "content"]
+        assert "".join(content) == "".join(tokens)
+        assert len(content) < len(tokens)
+
+    @pytest.mark.asyncio
+    async def test_read_only_tool_calls_run_concurrently(self, logger, browser):
+        """Test read-only tool calls overlap and results keep call order."""
+        running = 0
+        peak = 0
+
+        async def slow_get_text(ref):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return {"ok": True, "output": f"text of {ref}"}
+
+        browser.get_text = slow_get_text
+        client = ScriptedClient([
+            [
+                tool_call_chunk(0, "call_1", "browser_get_text", '{"ref": "e1"}'),
+                tool_call_chunk(1, "call_2", "browser_get_text", '{"ref": "e2"}'),
+            ],
+            [content_chunk("Done")],
+        ])
+        controller = AgentController(client, browser, logger)
+        await collect(controller, "read both")
+
+        assert peak == 2
+        tool_messages = [m for m in client.calls[1] if m["role"] == "tool"]
+        assert [m["tool_call_id"] for m in tool_messages] == ["call_1", "call_2"]
+        assert json.loads(tool_messages[0]["content"])["output"] == "text of e1"
+
+    @pytest.mark.asyncio
+    async def test_arguments_streamed_in_pieces(self, logger, browser):
+        """Test tool arguments split across chunks are parsed at stream end."""
+        client = ScriptedClient([
+            [
+                tool_call_chunk(0, "call_1", "browser_click", '{"ref"'),
+                {"choices": [{"delta": {"tool_calls": [
+                    {"index": 0, "function": {"arguments": ': "e2"}'}}
+                ]}}]},
+            ],
+            [content_chunk("Done")],
+        ])
+        controller = AgentController(client, browser, logger)
+        await collect(controller, "click it")
+        browser.click.assert_awaited_once_with(ref="e2")
+        assistant = next(m for m in client.calls[1] if m.get("tool_calls"))
+        assert assistant["tool_calls"][0]["function"]["arguments"] == '{"ref": "e2"}'
+
+    @pytest.mark.asyncio
+    async def test_tool_without_arguments_runs(self, logger, browser):
+        """Test a tool call with empty arguments is executed."""
+        browser.get_url = AsyncMock(return_value={"ok": True, "output": "https://example.com"})
+        client = ScriptedClient([
+            [tool_call_chunk(0, "call_1", "browser_get_url", "{}")],
+            [content_chunk("Done")],
+        ])
+        controller = AgentController(client, browser, logger)
+        chunks = await collect(controller, "where am I")
+        browser.get_url.assert_awaited_once_with()
+        assert not [c for c in chunks if c["type"] == "error"]
+
+    @pytest.mark.asyncio
+    async def test_closing_task_closes_llm_stream(self, logger, browser):
+        """Test closing process_task mid-stream closes the client stream."""
+        client = ScriptedClient([[content_chunk("x" * 100)] * 3])
+        controller = AgentController(client, browser, logger)
+
+        stream = controller.process_task("write")
+        async for chunk in stream:
+            if chunk["type"] == "content":
+                break
+        assert client.open_streams == 1
+        await stream.aclose()
+        assert client.open_streams == 0
+
+    @pytest.mark.asyncio
+    async def test_malformed_arguments_reported(self, logger, browser):
+        """Test truncated tool arguments are reported and not executed."""
+        client = ScriptedClient([
+            [tool_call_chunk(0, "call_1", "browser_click", '{"ref": "e')],
+            [content_chunk("Done")],
+        ])
+        controller = AgentController(client, browser, logger)
+        chunks = await collect(controller, "click it")
+        browser.click.assert_not_awaited()
+        assert any(c["type"] == "error" for c in chunks)
+        assert unanswered_tool_calls(client.calls[1]) == []
+
+
+class TestTrimHistory:
+    """Test the sliding window over stored conversation history."""
+
+    def test_trims_at_user_turn_boundaries(self, logger, browser):
+        """Test old turns are dropped whole and the system message is kept."""
+        controller = AgentController(ScriptedClient([]), browser, logger)
+        for turn in range(5):
+            controller.messages.append({"role": "user", "content": f"task {turn}"})
+            controller.messages.append({
+                "role": "assistant",
+                "content": "",
+                "tool_calls": [{"id": f"call_{turn}"}]
+            })
+            controller.messages.append({
+                "role": "tool",
+                "tool_call_id": f"call_{turn}",
+                "content": json.dumps({"tool": "browser_get_url", "ok": True, "output": "x"})
+            })
+        controller._trim_history()
+
+        history = controller.messages
+        assert history[0]["role"] == "system"
+        assert history[1]["role"] == "user"
+        assert len(history) - 1 <= controller.MAX_SUMMARIZED_HISTORY
+        assert history[-1]["tool_call_id"] == "call_4"
+
+    def test_long_turn_summarized_once(self, logger, browser):
+        """Test old results in one long turn are summarized by tool name, once."""
+        controller = AgentController(ScriptedClient([]), browser, logger)
+        controller.messages.append({"role": "user", "content": "task"})
+        for i in range(8):
+            controller.messages.append({
+                "role": "assistant",
+                "content": "",
+                "tool_calls": [{"id": f"call_{i}", "function": {"name": "browser_click"}}]
+            })
+            controller.messages.append({
+                "role": "tool",
+                "tool_call_id": f"call_{i}",
+                "content": json.dumps({"ok": True, "output": "clicked"})
+            })
+        controller._trim_history()
+
+        first = json.loads(controller.messages[3]["content"])
+        assert first == {"tool": "browser_click", "ok": True, "output": "Clicked element"}
+        assert controller.messages[-1]["content"] == json.dumps({"ok": True, "output": "clicked"})
+        upto = controller._summarized_upto
+        assert upto == len(controller.messages) - controller.MAX_SUMMARIZED_HISTORY
+
+        controller._trim_history()
+        assert controller._summarized_upto == upto
+
+    def test_short_history_untouched(self, logger, browser):
+        """Test history under the limit is left as is."""
+        controller = AgentController(ScriptedClient([]), browser, logger)
+        controller.messages.append({"role": "user", "content": "hi"})
+        before = list(controller.messages)
+        controller._trim_history()
+        assert controller.messages == before
+
+
+class TestToolCache:
+    """Test caching of read-only tool results."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_read_is_cached(self, logger, browser):
+        """Test an identical read-only call is served from the cache."""
+        controller = AgentController(ScriptedClient([]), browser, logger)
+        call = ToolCall("browser_get_text", {"ref": "e1"})
+        first = await controller._run_tool(call)
+        second = await controller._run_tool(call)
+        assert first == second
+        assert browser.get_text.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_reads_share_call(self, logger, browser):
+        """Test identical reads running at once hit the browser once."""
+        async def slow_get_text(ref):
+            await asyncio.sleep(0.01)
+            return {"ok": True, "output": f"text of {ref}"}
+
+        browser.get_text = AsyncMock(side_effect=slow_get_text)
+        controller = AgentController(ScriptedClient([]), browser, logger)
+        call = ToolCall("browser_get_text", {"ref": "e1"})
+        first, second = await asyncio.gather(
+            controller._run_tool(call), controller._run_tool(call)
+        )
+        assert first == second
+        assert browser.get_text.await_count == 1
+        assert not controller._inflight_reads
+
+    @pytest.mark.asyncio
+    async def test_action_invalidates_cache(self, logger, browser):
+        """Test a mutating call clears cached reads."""
+        controller = AgentController(ScriptedClient([]), browser, logger)
+        call = ToolCall("browser_get_text", {"ref": "e1"})
+        await controller._run_tool(call)
+        await controller._run_tool(ToolCall("browser_click", {"ref": "e2"}))
+        await controller._run_tool(call)
+        assert browser.get_text.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_read_not_cached(self, logger, browser):
+        """Test failed results are retried rather than cached."""
+        browser.get_text = AsyncMock(return_value={"ok": False, "output": "no element"})
+        controller = AgentController(ScriptedClient([]), browser, logger)
+        call = ToolCall("browser_get_text", {"ref": "e1"})
+        await controller._run_tool(call)
+        await controller._run_tool(call)
+        assert browser.get_text.await_count == 2
+
+
+class TestRunTool:
+    """Test dispatch of tool calls to browser methods."""
+
+    @pytest.mark.asyncio
+    async def test_dispatches_to_browser_method(self, logger, browser):
+        """Test a known tool calls the matching browser method."""
+        controller = AgentController(ScriptedClient([]), browser, logger)
+        result = await controller._run_tool(ToolCall("browser_click", {"ref": "e1"}))
+        browser.click.assert_awaited_once_with(ref="e1")
+        assert result["ok"]
+
+    @pytest.mark.asyncio
+    async def test_only_declared_tools_dispatch(self, logger, browser):
+        """Test names outside the tool list never reach the browser."""
+        browser.cleanup = AsyncMock()
+        controller = AgentController(ScriptedClient([]), browser, logger)
+        result = await controller._run_tool(ToolCall("browser_cleanup", {}))
+        browser.cleanup.assert_not_awaited()
+        assert not result["ok"]
+        assert "Unknown tool" in result["output"]
+
+
+class TestLoopDetection:
+    """Test detection of repeated tool calls."""
+
+    def test_counts_follow_window(self, logger, browser):
+        """Test counts drop as signatures leave the recent-actions window."""
+        controller = AgentController(ScriptedClient([]), browser, logger)
+        for _ in range(5):
+            controller._record_action("browser_click:e1")
+        for i in range(8):
+            controller._record_action(f"browser_click:e{i + 2}")
+
+        assert controller._action_counts["browser_click:e1"] == 2
+        assert sum(controller._action_counts.values()) == len(controller.recent_actions)
+
+    @pytest.mark.asyncio
+    async def test_repeated_call_reports_loop(self, logger, browser):
+        """Test the fifth identical call in the window yields loop_detected."""
+        click = tool_call_chunk(0, "call_1", "browser_click", '{"ref": "e1"}')
+        client = ScriptedClient([[click]] * 5 + [[content_chunk("Done")]])
+        controller = AgentController(client, browser, logger)
+        chunks = await collect(controller, "click")
+        assert [c["type"] for c in chunks].count("loop_detected") == 1
+
+    @pytest.mark.asyncio
+    async def test_stop_at_loop_keeps_history_valid(self, logger, browser):
+        """Test stopping at a loop prompt leaves no unanswered tool calls."""
+        clicks = [
+            [tool_call_chunk(0, f"call_{i}", "browser_click", '{"ref": "e1"}')]
+            for i in range(5)
+        ]
+        client = ScriptedClient(clicks + [[content_chunk("Done")]])
+        controller = AgentController(client, browser, logger)
+
+        stream = controller.process_task("click")
+        async for chunk in stream:
+            if chunk["type"] == "loop_detected":
+                break
+        await stream.aclose()
+        assert browser.click.await_count == 4
+
+        await collect(controller, "next task")
+        assert unanswered_tool_calls(client.calls[-1]) == []
+
+
+class TestSummarizeToolResult:
+    """Test one-line summaries of old tool results."""
+
+    @pytest.mark.parametrize("tool_name,output,expected", [
+        ("browser_open", "https://example.com", "Opened URL: https://example.com"),
+        ("browser_snapshot", {"refs": {"e1": {}, "e2": {}}}, "Snapshot: 2 interactive elements"),
+        ("browser_snapshot", "raw", "Snapshot taken"),
+        ("browser_click", "", "Clicked element"),
+        ("browser_hover", "", "browser_hover executed"),
+    ])
+    def test_summaries(self, logger, browser, tool_name, output, expected):
+        """Test each tool maps to its summary."""
+        controller = AgentController(ScriptedClient([]), browser, logger)
+        result = {"ok": True, "output": output}
+        assert controller._summarize_tool_result(tool_name, result) == expected
+
+    def test_failed_result(self, logger, browser):
+        """Test failures are summarized regardless of tool."""
+        controller = AgentController(ScriptedClient([]), browser, logger)
+        result = {"ok": False, "output": "boom"}
+        assert controller._summarize_tool_result("browser_click", result) == "browser_click failed"
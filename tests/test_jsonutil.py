@@ -0,0 +1,68 @@
+"""Tests for JSON helpers."""
+
+import json
+import pytest
+
+from src import jsonutil
+
+
+class TestLoads:
+    """Test JSON decoding."""
+
+    def test_loads_str(self):
+        """Test decoding a str document."""
+        assert jsonutil.loads('{"ok": true, "refs": {}}') == {"ok": True, "refs": {}}
+
+    def test_loads_bytes(self):
+        """Test decoding a bytes document."""
+        assert jsonutil.loads(b'[1, 2, 3]') == [1, 2, 3]
+
+    def test_loads_invalid_raises_stdlib_error(self):
+        """Test that invalid JSON raises json.JSONDecodeError for any backend."""
+        with pytest.raises(json.JSONDecodeError):
+            jsonutil.loads("not json")
+
+    def test_loads_without_orjson(self, monkeypatch):
+        """Test the stdlib fallback."""
+        monkeypatch.setattr(jsonutil, "orjson", None)
+        assert jsonutil.loads('{"a": 1}') == {"a": 1}
+
+
+class TestDumps:
+    """Test JSON encoding."""
+
+    def test_dumps_round_trip(self):
+        """Test encoding returns text that decodes to the same object."""
+        obj = {"ok": True, "output": "héllo", "refs": [1, 2]}
+        assert json.loads(jsonutil.dumps(obj)) == obj
+
+    def test_dumps_sort_keys(self):
+        """Test key order does not affect sorted output."""
+        assert jsonutil.dumps({"b": 1, "a": 2}, sort_keys=True) == \
+            jsonutil.dumps({"a": 2, "b": 1}, sort_keys=True)
+
+    def test_dumps_non_str_keys(self):
+        """Test values orjson rejects still encode via the stdlib."""
+        assert json.loads(jsonutil.dumps({1: "a"})) == {"1": "a"}
+
+    def test_dumps_without_orjson(self, monkeypatch):
+        """Test the stdlib fallback."""
+        monkeypatch.setattr(jsonutil, "orjson", None)
+        assert jsonutil.dumps({"b": 1, "a": 2}, sort_keys=True) == '{"a": 2, "b": 1}'
+
+
+class TestDumpsLine:
+    """Test encoding of JSON lines."""
+
+    def test_line_is_utf8_with_newline(self):
+        """Test non-ASCII text is kept and the line is newline-terminated."""
+        line = jsonutil.dumps_line({"content": "héllo"})
+        assert line.endswith(b"\n")
+        assert "héllo".encode("utf-8") in line
+        assert json.loads(line) == {"content": "héllo"}
+
+    def test_line_without_orjson(self, monkeypatch):
+        """Test the stdlib fallback matches."""
+        monkeypatch.setattr(jsonutil, "orjson", None)
+        line = jsonutil.dumps_line({"content": "héllo"})
+        assert line == '{"content": "héllo"}\n'.encode("utf-8")
@@ -0,0 +1,84 @@
+"""Tests for session logging."""
+
+import json
+
+from src.logger import SessionLogger
+
+
+class TestSessionLogger:
+    """Test the session transcript."""
+
+    def test_messages_written_as_jsonl(self, tmp_path):
+        """Test each message is a readable JSON line once flushed."""
+        logger = SessionLogger(tmp_path)
+        logger.log_message("user", "hello")
+        logger.log_tool_call("browser_open", {"url": "https://example.com"})
+        logger.flush()
+
+        lines = logger.session_file.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["role"] for line in lines] == ["user", "tool"]
+        logger.close()
+
+    def test_log_after_close_reopens(self, tmp_path):
+        """Test logging after close appends to the same transcript."""
+        logger = SessionLogger(tmp_path)
+        logger.log_message("user", "first")
+        logger.close()
+        logger.log_message("user", "second")
+        logger.close()
+
+        lines = logger.session_file.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["content"] for line in lines] == ["first", "second"]
+
+    def test_message_on_disk_without_flush(self, tmp_path):
+        """Test each message reaches disk as soon as it is logged."""
+        logger = SessionLogger(tmp_path)
+        logger.log_message("assistant", "partial transcript")
+
+        line = logger.session_file.read_text(encoding="utf-8")
+        assert json.loads(line)["content"] == "partial transcript"
+        logger.close()
+
+    def test_non_ascii_written_verbatim(self, tmp_path):
+        """Test non-ASCII content is stored as UTF-8 rather than escaped."""
+        logger = SessionLogger(tmp_path)
+        logger.log_message("assistant", "Привет")
+        logger.close()
+
+        text = logger.session_file.read_text(encoding="utf-8")
+        assert "Привет" in text
+
+    def test_browser_log_written_on_flush(self, tmp_path):
+        """Test browser log lines reach disk on flush."""
+        logger = SessionLogger(tmp_path)
+        logger.open_browser_log()
+        logger.log_browser_command(["agent-browser", "open", "https://example.com"])
+        logger.log_browser_output("ok")
+        logger.flush()
+
+        lines = logger.browser_log_file.read_text(encoding="utf-8").splitlines()
+        assert lines[0].endswith("CMD: agent-browser open https://example.com")
+        assert lines[1].endswith("OUT: ok")
+        logger.close()
+
+    def test_browser_log_flushed_after_line_bound(self, tmp_path):
+        """Test browser log lines reach disk without an explicit flush."""
+        logger = SessionLogger(tmp_path)
+        logger.BROWSER_LOG_FLUSH_INTERVAL = 3600
+        logger.open_browser_log()
+        for i in range(logger.BROWSER_LOG_FLUSH_LINES):
+            logger.write_browser_log(f"line {i}")
+
+        lines = logger.browser_log_file.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == logger.BROWSER_LOG_FLUSH_LINES
+        logger.close()
+
+    def test_browser_log_flushed_after_interval(self, tmp_path):
+        """Test a browser log line is written once the interval has passed."""
+        logger = SessionLogger(tmp_path)
+        logger.BROWSER_LOG_FLUSH_INTERVAL = 0
+        logger.open_browser_log()
+        logger.write_browser_log("first")
+
+        assert logger.browser_log_file.read_text(encoding="utf-8") == "first\n"
+        logger.close()
@@ -7,6 +7,7 @@ from unittest.mock import AsyncMock, patch, MagicMock
 from src.openrouter import (
     OpenRouterClient,
     OpenRouterError,
+    STATIC_PRICING,
     format_message,
     format_tool_message
 )
@@ -68,16 +69,16 @@ class TestOpenRouterClient:
         mock_response.status_code = 200
         
         # Create mock stream
-        async def mock_iter_lines():
+        async def mock_iter_bytes():
             chunks = [
                 'data: {"id": "test", "choices": [{"delta": {"content": "Hello"}}]}',
                 'data: {"id": "test", "choices": [{"delta": {"content": " world"}}]}',
                 'data: [DONE]'
             ]
             for chunk in chunks:
-                yield chunk
+                yield f"{chunk}\n".encode()
         
-        mock_response.aiter_lines = mock_iter_lines
+        mock_response.aiter_bytes = mock_iter_bytes
         mock_response.aread = AsyncMock(return_value=b"")
         
         # Mock the stream method to return an async context manager
@@ -100,15 +101,15 @@ class TestOpenRouterClient:
         mock_response = AsyncMock()
         mock_response.status_code = 200
         
-        async def mock_iter_lines():
+        async def mock_iter_bytes():
             chunks = [
                 'data: {"id": "test", "choices": [{"delta": {"content": "Thinking..."}}]}',
                 'data: [DONE]'
             ]
             for chunk in chunks:
-                yield chunk
+                yield f"{chunk}\n".encode()
         
-        mock_response.aiter_lines = mock_iter_lines
+        mock_response.aiter_bytes = mock_iter_bytes
         mock_response.aread = AsyncMock(return_value=b"")
         
         # Mock the stream context manager
@@ -120,7 +121,7 @@ class TestOpenRouterClient:
             {"type": "function", "function": {"name": "test", "parameters": {}}}
         ]
         
-        with patch.object(client.client, "stream", return_value=mock_stream_context):
+        with patch.object(client.client, "stream", return_value=mock_stream_context) as mock_stream:
             chunks = []
             async for chunk in client.stream_chat_completion(
                 [format_message("user", "test")],
@@ -129,6 +130,113 @@ class TestOpenRouterClient:
                 chunks.append(chunk)
             
             assert len(chunks) == 1
+            body = json.loads(mock_stream.call_args.kwargs["content"])
+            assert body["tools"] == tools
+            assert body["messages"] == [format_message("user", "test")]
+            assert body["stream"] is True
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("model,cached", [
+        ("anthropic/claude-sonnet-4", True),
+        ("openai/gpt-4o", False),
+    ])
+    async def test_system_prompt_cache_breakpoint(self, mock_api_key, model, cached):
+        """Test Anthropic requests mark the system prompt for caching."""
+        client = OpenRouterClient(api_key=mock_api_key, model=model)
+        mock_response = AsyncMock()
+        mock_response.status_code = 200
+
+        async def mock_iter_bytes():
+            yield b'data: [DONE]\n'
+
+        mock_response.aiter_bytes = mock_iter_bytes
+        mock_stream_context = AsyncMock()
+        mock_stream_context.__aenter__.return_value = mock_response
+        mock_stream_context.__aexit__.return_value = None
+        messages = [format_message("system", "You browse."), format_message("user", "hi")]
+
+        with patch.object(client.client, "stream", return_value=mock_stream_context) as mock_stream:
+            async for _ in client.stream_chat_completion(messages):
+                pass
+
+        body = json.loads(mock_stream.call_args.kwargs["content"])
+        system = body["messages"][0]
+        if cached:
+            assert system["content"] == [{
+                "type": "text",
+                "text": "You browse.",
+                "cache_control": {"type": "ephemeral"}
+            }]
+        else:
+            assert system["content"] == "You browse."
+        assert body["messages"][1] == format_message("user", "hi")
+        assert messages[0]["content"] == "You browse."
+
+    @pytest.mark.asyncio
+    async def test_pricing_from_one_models_fetch(self, client):
+        """Test one models request serves pricing for every model."""
+        models = {"data": [
+            {"id": "a/one", "pricing": {"prompt": "1", "completion": "2"}},
+            {"id": "b/two", "pricing": {"prompt": "3", "completion": "4"}},
+        ]}
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps(models).encode()
+
+        with patch.object(client.client, "get", AsyncMock(return_value=mock_response)) as mock_get:
+            assert await client.get_model_pricing("a/one") == {"input": 1.0, "output": 2.0}
+            assert await client.get_model_pricing("b/two") == {"input": 3.0, "output": 4.0}
+            assert await client.get_model_pricing("a/one") == {"input": 1.0, "output": 2.0}
+            assert mock_get.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_pricing_falls_back_to_static(self, client):
+        """Test a failed models request uses the static pricing table."""
+        mock_response = MagicMock()
+        mock_response.status_code = 500
+
+        with patch.object(client.client, "get", AsyncMock(return_value=mock_response)):
+            pricing = await client.get_model_pricing("openai/gpt-4o")
+        assert pricing == STATIC_PRICING["openai/gpt-4o"]
+
+    @pytest.mark.asyncio
+    async def test_sse_lines_split_across_blocks(self, client):
+        """Test events split mid-line, CRLF endings and comments are handled."""
+        mock_response = AsyncMock()
+        mock_response.status_code = 200
+
+        async def mock_iter_bytes():
+            yield b': keep-alive\r\ndata: {"choices": [{"delta": {"con'
+            yield b'tent": "Hi"}}]}\r\n\r\ndata: {"choices": []}'
+            yield b'\r\ndata: [DONE]\r\n'
+
+        mock_response.aiter_bytes = mock_iter_bytes
+        mock_stream_context = AsyncMock()
+        mock_stream_context.__aenter__.return_value = mock_response
+        mock_stream_context.__aexit__.return_value = None
+
+        with patch.object(client.client, "stream", return_value=mock_stream_context):
+            chunks = [c async for c in client.stream_chat_completion([format_message("user", "hi")])]
+
+        assert chunks == [{"choices": [{"delta": {"content": "Hi"}}]}, {"choices": []}]
+
+    def test_parse_sse_chunk(self, client):
+        """Test SSE payloads decode from bytes and bad JSON is dropped."""
+        assert client._parse_sse_chunk(b'{"id": "x"}') == {"id": "x"}
+        assert client._parse_sse_chunk(b'{"id": ') is None
+
+    def test_client_sends_auth_headers(self, client, mock_api_key):
+        """Test static headers are set once on the pooled HTTP client."""
+        assert client.client.headers["Authorization"] == f"Bearer {mock_api_key}"
+        assert client.client.headers["X-Title"] == "Browser Agent CLI"
+
+    def test_encode_tools_reuses_encoding(self, client):
+        """Test the same tools list is only encoded once."""
+        tools = [{"type": "function", "function": {"name": "test"}}]
+        first = client._encode_tools(tools)
+        assert client._encode_tools(tools) is first
+        assert json.loads(first) == tools
     
     @pytest.mark.asyncio
     async def test_stream_error_handling(self, client):
@@ -40,6 +40,14 @@ class TestToolCall:
         assert "browser.open" in repr_str
         assert "url=" in repr_str
 
+    def test_signature_ignores_key_order(self):
+        """Test signatures match for the same args in any order."""
+        first = ToolCall("browser_fill", {"ref": "e1", "text": "a"})
+        second = ToolCall("browser_fill", {"text": "a", "ref": "e1"})
+        assert first.signature == second.signature
+        assert first.signature.startswith("browser_fill:")
+        assert first.signature != ToolCall("browser_fill", {"ref": "e2", "text": "a"}).signature
+
 
 class TestParseToolCalls:
     """Test tool call parsing."""
@@ -99,6 +107,37 @@ class TestParseToolCalls:
         }
         result = parse_tool_calls(delta)
         assert result is None
+    
+    def test_parse_tool_call_partial_arguments(self):
+        """Test that a partial argument fragment is not a tool call."""
+        delta = {
+            "tool_calls": [
+                {
+                    "id": "call_123",
+                    "function": {
+                        "name": "browser.open",
+                        "arguments": '{"url": "https://exa'
+                    }
+                }
+            ]
+        }
+        assert parse_tool_calls(delta) is None
+    
+    def test_parse_tool_call_braces_in_strings(self):
+        """Test that unbalanced braces inside string values still parse."""
+        delta = {
+            "tool_calls": [
+                {
+                    "function": {
+                        "name": "browser.fill",
+                        "arguments": '{"ref": "e1", "text": "a { b"} \n'
+                    }
+                }
+            ]
+        }
+        result = parse_tool_calls(delta)
+        assert result is not None
+        assert result.args == {"ref": "e1", "text": "a { b"}
 
 
 class TestFormatToolResult:
@@ -151,3 +190,17 @@ class TestTruncateOutput:
         result = truncate_output(output, max_size=100)
         assert len(result) > 100
         assert "truncated" in result.lower()
+    
+    def test_truncation_keep_both(self):
+        """Test keeping both ends of the output."""
+        output = "start" + "a" * 1000 + "end"
+        result = truncate_output(output, max_size=100, keep="both")
+        assert result.startswith("start")
+        assert result.endswith("end")
+        assert "908 characters omitted" in result
+    
+    def test_truncation_keep_both_tiny_limit(self):
+        """Test a limit too small to split keeps neither end."""
+        result = truncate_output("abcdef", max_size=1, keep="both")
+        assert "abcdef" not in result
+        assert "6 characters omitted" in result